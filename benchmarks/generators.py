@@ -0,0 +1,158 @@
+import io
+import os
+import gzip
+import zipfile
+import argparse
+import numpy as np
+
+
+# Create a vocabulary of random lowercase words, with lengths between 2 and 10 characters
+def generate_vocabulary(vocabulary_size, rng):
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    lengths = rng.integers(2, 11, vocabulary_size)
+    chars = letters[rng.integers(0, len(letters), lengths.sum())]
+    return np.array([''.join(word) for word in np.split(chars, np.cumsum(lengths)[:-1])])
+
+
+# Get the probability of replacing each word of an essay, so that the Jaccard similarity between the word shingles
+# (of shingles_len words) of the essay and of the mutated copy is about the wanted one.
+# A shingle survives with probability q = (1 - p)^shingles_len, and J = q / (2 - q) if the new shingles are all different
+def get_mutation_rate(jaccard, shingles_len):
+    surviving = 2 * jaccard / (1 + jaccard)
+    return 1 - surviving ** (1 / shingles_len)
+
+
+# Generate a corpus of near-duplicate essays: clusters of cluster_size essays, each made of a random base essay and of
+# copies where some words are replaced, so that their Jaccard similarity with the base essay is about the given one
+# Returns the list of essays and the cluster of each of them
+def generate_essays(n_essays, essay_len=200, cluster_size=3, jaccard=0.8, shingles_len=3, vocabulary_size=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = generate_vocabulary(vocabulary_size, rng)
+    mutation_rate = get_mutation_rate(jaccard, shingles_len)
+
+    essays, clusters = [], []
+    for cluster in range(-(-n_essays // cluster_size)):
+        base_words = rng.integers(0, vocabulary_size, essay_len)
+
+        for copy in range(min(cluster_size, n_essays - len(essays))):
+            words = base_words.copy()
+            if copy > 0:
+                mutated = rng.random(essay_len) < mutation_rate
+                words[mutated] = rng.integers(0, vocabulary_size, mutated.sum())
+            essays.append(' '.join(vocabulary[words]))
+            clusters.append(cluster)
+
+    return essays, np.array(clusters)
+
+
+# Generate transaction baskets as the IBM Quest generator (Agrawal and Srikant, 1994) does:
+# - potentially large itemsets (patterns) of average size avg_pattern_len, each sharing with the previous one a
+#   fraction of its items (exponentially distributed with mean correlation), with exponentially distributed weights
+# - transactions of average size avg_transaction_len, filled with patterns picked by weight, where each pattern
+#   is corrupted by dropping its items while a uniform number is lower than its corruption level
+# Returns a list of baskets, each a sorted list of items, as in T10I4D100K
+def generate_baskets(n_transactions, avg_transaction_len=10, avg_pattern_len=4, n_patterns=1000, n_items=1000,
+                     correlation=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+
+    # Generate the patterns, their weights and their corruption levels
+    patterns = []
+    for _ in range(n_patterns):
+        size = max(1, rng.poisson(avg_pattern_len))
+        shared = []
+        if patterns:
+            n_shared = min(size, int(round(rng.exponential(correlation) * size)), len(patterns[-1]))
+            shared = rng.choice(patterns[-1], n_shared, replace=False).tolist()
+        new_items = rng.integers(0, n_items, size - len(shared)).tolist()
+        patterns.append(np.unique(shared + new_items))
+    weights = rng.exponential(1, n_patterns)
+    weights /= weights.sum()
+    corruptions = np.clip(rng.normal(0.5, 0.1, n_patterns), 0, 1)
+
+    # Pick the patterns of all the transactions at once, at most avg_transaction_len per transaction
+    sizes = np.maximum(1, rng.poisson(avg_transaction_len, n_transactions))
+    picked = rng.choice(n_patterns, (n_transactions, avg_transaction_len), p=weights)
+
+    baskets = []
+    for size, pattern_ids in zip(sizes, picked):
+        basket = set()
+        for pattern_id in pattern_ids:
+            # Corrupt the pattern, dropping its items while the uniform number is lower than the corruption level
+            pattern = patterns[pattern_id]
+            n_dropped = 0
+            while n_dropped < len(pattern) and rng.random() < corruptions[pattern_id]:
+                n_dropped += 1
+            items = rng.permutation(pattern)[n_dropped:]
+
+            # If the pattern does not fit in the transaction, it is added anyway half of the times
+            if basket and len(basket) + len(items) > size and rng.random() < 0.5:
+                break
+            basket.update(items.tolist())
+            if len(basket) >= size:
+                break
+        baskets.append(sorted(basket))
+
+    return baskets
+
+
+# Generate a stream of n_edges distinct undirected edges of a graph with a power-law degree distribution, as the
+# Chung-Lu model does: the endpoints of each edge are drawn with probability proportional to the weight of the node,
+# w_i = (i + 1)^(-1 / (exponent - 1)). Edges are returned in random order as (u, v) with u < v.
+def generate_edge_stream(n_nodes, n_edges, exponent=2.1, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = np.arange(1, n_nodes + 1) ** (-1 / (exponent - 1))
+    weights /= weights.sum()
+
+    # Draw edges until there are enough distinct ones, without self-loops
+    edges = np.empty((0, 2), dtype=np.int64)
+    while len(edges) < n_edges:
+        new_edges = rng.choice(n_nodes, (2 * (n_edges - len(edges)) + 100, 2), p=weights)
+        new_edges = np.sort(new_edges[new_edges[:, 0] != new_edges[:, 1]], axis=1)
+        edges = np.unique(np.concatenate((edges, new_edges)), axis=0)
+
+    edges = edges[rng.permutation(len(edges))[:n_edges]]
+    return edges
+
+
+# Write the essays in a zip file with a single CSV, with the "full_text" column read by homework1
+def write_essays(zip_file, essays):
+    csv = io.StringIO()
+    csv.write('essay_id,full_text\n')
+    for essay_id, essay in enumerate(essays):
+        csv.write(f'{essay_id},"{essay}"\n')
+
+    with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as dataset_zipfile:
+        dataset_zipfile.writestr('essays.csv', csv.getvalue())
+
+
+# Write the baskets in the format of T10I4D100K.dat, a basket per line
+def write_baskets(dataset_file, baskets):
+    with open(dataset_file, 'w') as f:
+        for basket in baskets:
+            f.write(' '.join(map(str, basket)) + '\n')
+
+
+# Write the edges in the gzipped format of the SNAP datasets read by homework3
+def write_edge_stream(dataset_file, edges):
+    with gzip.open(dataset_file, 'wt') as f:
+        f.write('# FromNodeId\tToNodeId\n')
+        np.savetxt(f, edges, fmt='%d', delimiter='\t')
+
+
+# When this file is directly executed, write the synthetic datasets in the format of the homeworks
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic datasets for the homework pipelines.')
+    parser.add_argument('-output-dir', default='datasets', help='directory where the datasets are written')
+    parser.add_argument('-essays', default=1000, type=int, help='number of essays')
+    parser.add_argument('-jaccard', default=0.8, type=float, help='Jaccard similarity of the near duplicates')
+    parser.add_argument('-transactions', default=100000, type=int, help='number of transaction baskets')
+    parser.add_argument('-nodes', default=100000, type=int, help='number of nodes of the graph')
+    parser.add_argument('-edges', default=1000000, type=int, help='number of edges of the stream')
+    parser.add_argument('-seed', default=0, type=int, help='seed of the generators')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    essays, _ = generate_essays(args.essays, jaccard=args.jaccard, seed=args.seed)
+    write_essays(os.path.join(args.output_dir, 'synthetic_essays.zip'), essays)
+    write_baskets(os.path.join(args.output_dir, 'synthetic_baskets.dat'), generate_baskets(args.transactions, seed=args.seed))
+    write_edge_stream(os.path.join(args.output_dir, 'synthetic_edges.txt.gz'), generate_edge_stream(args.nodes, args.edges, seed=args.seed))
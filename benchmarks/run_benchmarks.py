@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+import multiprocessing
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from generators import generate_essays, generate_baskets, generate_edge_stream, write_baskets
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Sizes of the synthetic datasets at each scale
+SCALES = {
+    'small':  {'essays': 200,  'transactions': 5000,   'nodes': 5000,   'edges': 20000},
+    'medium': {'essays': 1000, 'transactions': 20000,  'nodes': 20000,  'edges': 100000},
+    'large':  {'essays': 5000, 'transactions': 100000, 'nodes': 100000, 'edges': 500000}
+}
+
+
+# Each benchmark prepares its data (not timed) and returns a function running the timed part, which returns a
+# dictionary summarizing its result, so that the results of different versions can be compared as well as their times
+
+def setup_minhashing(scale, seed):
+    from classes import Shingling, MinHashing
+    essays, _ = generate_essays(scale['essays'], seed=seed)
+    characteristic_matrix = Shingling(3, 'word').create_characteristic_matrix(essays)
+
+    def run():
+        signature = MinHashing(100, seed=seed).compute_signature_hash(characteristic_matrix)
+        return {'shingles': characteristic_matrix.shape[0], 'signature_shape': list(signature.shape)}
+    return run
+
+
+def setup_lsh(scale, seed):
+    from classes import Shingling, MinHashing, LSH, CompareSets
+    essays, _ = generate_essays(scale['essays'], seed=seed)
+    characteristic_matrix = Shingling(3, 'word').create_characteristic_matrix(essays)
+    signature = MinHashing(100, seed=seed).compute_signature_hash(characteristic_matrix)
+    true_pairs = CompareSets.jaccard_similar_pairs(characteristic_matrix, 0.7)
+
+    def run():
+        similar_pairs = LSH(20, 0.7).find_similar_pairs(signature)
+        precision, recall = CompareSets.precision_recall(similar_pairs, true_pairs)
+        return {'similar_pairs': len(similar_pairs), 'precision': precision, 'recall': recall}
+    return run
+
+
+def setup_apriori(scale, seed):
+    from classes import Apriori
+    dataset_file = os.path.join(tempfile.mkdtemp(), 'baskets.dat')
+    write_baskets(dataset_file, generate_baskets(scale['transactions'], seed=seed))
+
+    # The support is 1% of the transactions, as 1000 for T10I4D100K
+    def run():
+        L = Apriori(dataset_file, scale['transactions'] // 100).algorithm(verbose=False)
+        return {'frequent_itemsets': {str(k): len(L_k) for k, L_k in L.items()}}
+    return run
+
+
+def setup_triest(triest_class, scale, seed):
+    edges = generate_edge_stream(scale['nodes'], scale['edges'], seed=seed).tolist()
+
+    # The reservoir holds 10% of the edges
+    def run():
+        triest = triest_class(scale['edges'] // 10, seed=seed)
+        for u, v in edges:
+            triest.process_edge(u, v)
+        return {'estimate': float(triest.estimate())}
+    return run
+
+
+def setup_triest_base(scale, seed):
+    from homework_classes import TriestBase
+    return setup_triest(TriestBase, scale, seed)
+
+
+def setup_triest_impr(scale, seed):
+    from homework_classes import TriestImpr
+    return setup_triest(TriestImpr, scale, seed)
+
+
+# Benchmarks of each homework, which are run in their own process, since the homeworks have modules with the same name
+BENCHMARKS = {
+    'minhashing': ('homework1', setup_minhashing),
+    'lsh': ('homework1', setup_lsh),
+    'apriori': ('homework2', setup_apriori),
+    'triest_base': ('homework3', setup_triest_base),
+    'triest_impr': ('homework3', setup_triest_impr)
+}
+
+
+# Run a benchmark at a scale, repeating the timed part, then measuring its peak memory in a separate run,
+# since tracemalloc slows down the execution
+def run_benchmark(name, scale_name, repeats, track_memory, seed):
+    homework, setup = BENCHMARKS[name]
+    sys.path.insert(0, str(ROOT_DIR / homework))
+    run = setup(SCALES[scale_name], seed)
+
+    times, result = [], None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - start_time)
+
+    peak_memory = None
+    if track_memory:
+        tracemalloc.start()
+        run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {'benchmark': name, 'scale': scale_name, 'parameters': SCALES[scale_name], 'times': times,
+            'min_time': min(times), 'median_time': statistics.median(times), 'peak_memory': peak_memory, 'result': result}
+
+
+# Describe the environment of the run, so that results of different machines or versions are not mixed up
+def get_metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+
+    return {'commit': commit, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'seed': args.seed, 'repeats': args.repeats}
+
+
+# Compare the results with the ones of a previous run, printing the speedup of each benchmark
+def compare_results(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = {(r['benchmark'], r['scale']): r for r in json.load(f)['results']}
+
+    for r in results:
+        old = baseline.get((r['benchmark'], r['scale']))
+        if old is None:
+            continue
+        changed = ' (different result)' if old['result'] != r['result'] else ''
+        print(f'{r["benchmark"]:>12} {r["scale"]:>6}: {old["min_time"]:.3f}s -> {r["min_time"]:.3f}s '
+              f'({old["min_time"] / r["min_time"]:.2f}x){changed}')
+
+
+# When this file is directly executed, run the benchmarks and write their results in a JSON file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the homework pipelines on synthetic datasets.')
+    parser.add_argument('-benchmarks', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('-scales', nargs='+', default=['small', 'medium'], choices=list(SCALES), help='scales of the datasets')
+    parser.add_argument('-repeats', default=3, type=int, help='number of timed runs of each benchmark')
+    parser.add_argument('-no-memory', default=False, action='store_true', help='do not measure the peak memory')
+    parser.add_argument('-seed', default=0, type=int, help='seed of the generators and of the algorithms')
+    parser.add_argument('-output', default='benchmark_results.json', help='JSON file where the results are written')
+    parser.add_argument('-compare', default=None, help='JSON file of a previous run to compare with')
+    args = parser.parse_args()
+
+    # Each benchmark runs in a new interpreter, so the modules of different homeworks do not clash
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for name in args.benchmarks:
+        for scale_name in args.scales:
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = executor.submit(run_benchmark, name, scale_name, args.repeats, not args.no_memory, args.seed).result()
+            results.append(result)
+            peak_memory = f', peak memory {result["peak_memory"] / 2**20:.1f} MiB' if result['peak_memory'] is not None else ''
+            print(f'{name:>12} {scale_name:>6}: {result["min_time"]:.3f}s{peak_memory} {result["result"]}')
+
+    with open(args.output, 'w') as f:
+        json.dump({'metadata': get_metadata(args), 'results': results}, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        compare_results(results, args.compare)
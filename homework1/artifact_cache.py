@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import numpy as np
+from scipy import sparse
+from classes import BBitSignature
+
+
+class ArtifactCache:
+    """
+    On-disk cache of the intermediate results of the pipeline (processed essays, characteristic matrix, signature).
+    Each artifact is stored under a key obtained by hashing all the parameters it depends on, including the key of the
+    artifact it is computed from, so a change in any earlier stage creates new keys.
+    The least recently used artifacts are removed when the cache grows over max_size bytes.
+    If cache_dir is None, the cache is disabled and the artifacts are always computed.
+    """
+
+    # Name of the file of each kind of artifact
+    EXTENSIONS = {'text': '.text.json', 'matrix': '.matrix.npz', 'signature': '.signature.npy', 'bbit': '.bbit.npz'}
+
+    def __init__(self, cache_dir='cache', max_size=2**30):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # Compute the key of an artifact from the keys of the artifacts it depends on and its parameters
+    @staticmethod
+    def get_key(*parent_keys, **parameters):
+        description = json.dumps([parent_keys, parameters], sort_keys=True, default=str)
+        return hashlib.sha256(description.encode()).hexdigest()[:32]
+
+    # Get the identity of a dataset file, as its path, size and modification time, to be used as a parameter of a key
+    @staticmethod
+    def get_file_id(file):
+        file_stat = os.stat(file)
+        return [os.path.abspath(file), file_stat.st_size, file_stat.st_mtime_ns]
+
+    def get_path(self, key, kind):
+        return os.path.join(self.cache_dir, key + self.EXTENSIONS[kind])
+
+    # Return the cached artifact, or compute it and store it in the cache
+    # The kind of the artifact ('text', 'matrix' or 'signature') decides the format of its file
+    def get_or_compute(self, kind, key, compute):
+        if self.cache_dir is None:
+            return compute()
+
+        artifact = self.load(kind, key)
+        if artifact is None:
+            artifact = compute()
+            self.save(kind, key, artifact)
+        return artifact
+
+    # Load an artifact, returning None if it is not in the cache. Signatures are memory-mapped.
+    def load(self, kind, key):
+        # b-bit signatures have their own file, with the number of bits and the shape of the signature
+        if kind == 'signature' and os.path.exists(self.get_path(key, 'bbit')):
+            kind = 'bbit'
+        path = self.get_path(key, kind)
+        if not os.path.exists(path):
+            return None
+
+        # Mark the artifact as recently used
+        os.utime(path)
+
+        if kind == 'text':
+            with open(path) as f:
+                return json.load(f)
+        elif kind == 'matrix':
+            return sparse.load_npz(path).tocsr()
+        elif kind == 'bbit':
+            with np.load(path) as bbit:
+                return BBitSignature.from_packed(bbit['packed'], int(bbit['bits']), tuple(bbit['shape']))
+        return np.load(path, mmap_mode='r')
+
+    # Store an artifact, writing it to a temporary file first, so a partially written artifact is never loaded
+    def save(self, kind, key, artifact):
+        if kind == 'signature' and isinstance(artifact, BBitSignature):
+            kind = 'bbit'
+        path = self.get_path(key, kind)
+        tmp_path = path + '.tmp'
+
+        with open(tmp_path, 'wb') as f:
+            if kind == 'text':
+                f.write(json.dumps(artifact).encode())
+            elif kind == 'matrix':
+                sparse.save_npz(f, artifact, compressed=False)
+            elif kind == 'bbit':
+                np.savez(f, packed=artifact.packed, bits=artifact.bits, shape=artifact.shape)
+            else:
+                np.save(f, artifact)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    # Remove the least recently used artifacts until the size of the cache is at most max_size
+    # The most recent artifact is always kept, even if it is larger than max_size
+    def evict(self):
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.is_file() and not entry.name.endswith('.tmp')]
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        total_size = sum(entry.stat().st_size for entry in entries)
+
+        for entry in entries[:-1]:
+            if total_size <= self.max_size:
+                break
+            total_size -= entry.stat().st_size
+            os.remove(entry.path)
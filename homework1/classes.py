@@ -1,15 +1,30 @@
+import os
 import math
 import numpy as np
 import sympy as sp
 import itertools
 from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
 from collections import defaultdict
 
 
 class Shingling:
+    # Constants of the 64-bit polynomial hashing: an odd base (so it is invertible modulo 2^64) and its inverse
+    HASH_BASE = 0x100000001B3
+    HASH_BASE_INVERSE = pow(HASH_BASE, -1, 2**64)
+    WHITESPACES = np.frombuffer(b' \t\n\r\x0b\x0c', dtype=np.uint8)
+
     # The constructor for the class Shingling, with default shingles_len = 10
-    def __init__(self, shingles_len=10):
+    # shingle_type is 'char' for shingles of shingles_len characters, or 'word' for shingles of shingles_len words.
+    # If weighted, the characteristic matrix holds the number of occurrences of each shingle (its term frequency)
+    # instead of a boolean, as needed by weighted MinHash
+    def __init__(self, shingles_len=10, shingle_type='char', weighted=False):
+        if shingle_type not in ('char', 'word'):
+            raise ValueError(f'Unknown shingle type {shingle_type}, choose between char and word')
+
         self.shingles_len = shingles_len
+        self.shingle_type = shingle_type
+        self.weighted = weighted
 
     # A shingle is hashed on a number from 0 to 2^32
     def hash_shingles(self, shingle):
@@ -41,6 +56,48 @@ class Shingling:
         unique_shingles.sort()
         return unique_shingles
 
+    # Vectorized 64-bit hashing of the ranges [starts, ends) of an array of values: each range is hashed as the polynomial
+    # sum(values[j] * B^(end - 1 - j)) modulo 2^64, computed for all the ranges at once from the prefix sums of
+    # values[j] * B^(n - 1 - j). The result is then mixed with its length by the splitmix64 finalizer.
+    @staticmethod
+    def hash_ranges(values, starts, ends):
+        values = np.asarray(values, dtype=np.uint64)
+        n = len(values)
+
+        # Powers of the base and of its inverse, the multiplications wrap around modulo 2^64
+        powers = np.ones(n + 1, dtype=np.uint64)
+        np.cumprod(np.full(n, Shingling.HASH_BASE, dtype=np.uint64), out=powers[1:])
+        inverse_powers = np.ones(n + 1, dtype=np.uint64)
+        np.cumprod(np.full(n, Shingling.HASH_BASE_INVERSE, dtype=np.uint64), out=inverse_powers[1:])
+
+        prefix = np.zeros(n + 1, dtype=np.uint64)
+        np.cumsum(values * powers[n - 1::-1][:n], out=prefix[1:])
+        hashes = (prefix[ends] - prefix[starts]) * inverse_powers[n - ends]
+
+        # Mix the length of the ranges and the bits of the hashes
+        hashes ^= (ends - starts).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        hashes = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        hashes = (hashes ^ (hashes >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return hashes ^ (hashes >> np.uint64(31))
+
+    # Hash all the shingles of the essay, with repetitions, with the vectorized backend: the character shingles are
+    # windows of the essay bytes, the word shingles are windows of the hashes of its words
+    def hash_essay_shingles(self, essay):
+        tokens = np.frombuffer(essay.encode(), dtype=np.uint8)
+
+        if self.shingle_type == 'word':
+            # Find the words as the ranges of bytes between whitespaces, and hash each of them
+            is_space = np.isin(tokens, self.WHITESPACES)
+            boundaries = np.flatnonzero(np.diff(np.concatenate(([True], is_space, [True])).astype(np.int8)))
+            tokens = self.hash_ranges(tokens, boundaries[0::2], boundaries[1::2])
+
+        starts = np.arange(max(len(tokens) - self.shingles_len + 1, 0))
+        return self.hash_ranges(tokens, starts, starts + self.shingles_len)
+
+    # Get the sorted unique shingles of the essay, together with the number of occurrences of each of them
+    def create_weighted_shingles(self, essay):
+        return np.unique(self.hash_essay_shingles(essay), return_counts=True)
+
     # For each essay, creates its shingles' set. Then it creates a global dictionary (idx, shingles)
     def create_essay_shingles(self, essay_list):
         essay_shingles = []
@@ -64,6 +121,9 @@ class Shingling:
 
     # Create a characteristic matrix from the global shingles dictionary and each essays' shingles list
     def create_characteristic_matrix(self, essay_list):
+        # Word and weighted shingles are built with the vectorized hashing backend
+        if self.shingle_type != 'char' or self.weighted:
+            return self.create_hashed_characteristic_matrix(essay_list)
 
         # After calling the functions, get the number of essays and the number of global shingles
         essay_shingles, shingle_idxs = self.create_essay_shingles(essay_list)
@@ -87,6 +147,22 @@ class Shingling:
         
         return characteristic_matrix
 
+    # Create the characteristic matrix from the 64-bit hashes of the shingles, without any Python set or dictionary:
+    # the global shingles are the unique hashes of all the essays. If weighted, each cell holds the term frequency.
+    def create_hashed_characteristic_matrix(self, essay_list):
+        essay_shingles, essay_counts = zip(*(self.create_weighted_shingles(essay) for essay in essay_list)) if essay_list else ((), ())
+        shingles_number = [len(shingles) for shingles in essay_shingles]
+
+        all_shingles = np.concatenate(essay_shingles) if essay_list else np.empty(0, dtype=np.uint64)
+        global_shingles, shingle_indices = np.unique(all_shingles, return_inverse=True)
+        essay_indices = np.repeat(np.arange(len(essay_list)), shingles_number)
+
+        if self.weighted:
+            data, dtype = np.concatenate(essay_counts) if essay_list else np.empty(0), np.float32
+        else:
+            data, dtype = np.ones(len(all_shingles)), np.bool_
+        return sparse.csr_matrix((data, (shingle_indices, essay_indices)), shape=(len(global_shingles), len(essay_list)), dtype=dtype)
+
 
 class CompareSets:
 
@@ -97,26 +173,129 @@ class CompareSets:
         similarity = len(set_1.intersection(set_2)) / len(set_1.union(set_2))
         return similarity
 
+    # Find all the pairs of essays with a Jaccard similarity higher than the threshold, computing exactly the
+    # intersections of all the pairs as C'*C on the characteristic matrix C. The essays are processed in blocks of
+    # block_size columns, so that only a block_size x n_essays matrix of intersections is kept in memory at once
+    @staticmethod
+    def jaccard_similar_pairs(characteristic_matrix, threshold=0.8, block_size=1000):
+        # Get the matrix with essays as rows, and the number of shingles of each essay
+        essays_matrix = sparse.csr_matrix(characteristic_matrix.T.astype(np.bool_), dtype=np.int32)
+        n_essays = essays_matrix.shape[0]
+        shingles_number = np.diff(essays_matrix.indptr)
+
+        similar_essays = []
+        for block_head in range(0, n_essays, block_size):
+            block_tail = min(block_head + block_size, n_essays)
+
+            # Compute the intersections of the essays of the block with all the following essays
+            intersections = (essays_matrix[block_head:block_tail] @ essays_matrix[block_head:].T).tocoo()
+            essay_1 = intersections.row + block_head
+            essay_2 = intersections.col + block_head
+
+            # Keep each pair only once, then compute its similarity as |A n B| / (|A| + |B| - |A n B|)
+            upper = essay_1 < essay_2
+            essay_1, essay_2, intersection = essay_1[upper], essay_2[upper], intersections.data[upper]
+            similarity = intersection / (shingles_number[essay_1] + shingles_number[essay_2] - intersection)
+
+            similar = similarity > threshold
+            similar_essays.extend(zip(essay_1[similar].tolist(), essay_2[similar].tolist()))
+
+        return similar_essays
+
+    # Compare the pairs found by an approximate method (e.g. LSH) with the exact ones, returning precision and recall
+    @staticmethod
+    def precision_recall(found_pairs, true_pairs):
+        found_pairs, true_pairs = set(map(tuple, found_pairs)), set(map(tuple, true_pairs))
+        true_positives = len(found_pairs & true_pairs)
+
+        precision = true_positives / len(found_pairs) if found_pairs else 1.0
+        recall = true_positives / len(true_pairs) if true_pairs else 1.0
+        return precision, recall
+
 
 class MinHashing:
 
-    def __init__(self, sign_number=500):
+    # Prime of the hash functions applied directly to the shingles, by compute_shingle_signature
+    SHINGLE_PRIME = 2**31 - 1
+
+    # signature_bits selects how the signature is stored: None for a float64 matrix, 32 for a uint32 matrix, or b < 32
+    # for a b-bit MinHash signature, which keeps only the lowest b bits of each value, packed (see BBitSignature)
+    # The coefficients of the hash functions are drawn from a NumPy Generator seeded with seed. If it is None, a seed is
+    # drawn once here, so that all the shards signed by this instance use the same hash functions anyway
+    def __init__(self, sign_number=500, signature_bits=None, seed=None):
         self.sign_number = sign_number
+        self.signature_bits = signature_bits
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
 
+    # Compute the signature of the essays (the columns of the characteristic matrix)
     def compute_signature_hash(self, characteristic_matrix):
+        signature = self.compute_signature_values(characteristic_matrix)
+
+        # Keep only the lowest bits of each value for the b-bit signatures
+        if self.signature_bits is not None and self.signature_bits < 32:
+            return BBitSignature(signature, self.signature_bits)
+        return signature
+
+    # Compute the signature splitting the essays in n_shards shards, signed in parallel by different processes
+    # The hash functions only depend on the seed and on the number of shingles (the rows of each shard), so the
+    # signature is identical to the one computed by compute_signature_hash
+    def compute_signature_parallel(self, characteristic_matrix, n_shards=None, workers=None):
+        n_essays = characteristic_matrix.shape[1]
+        n_shards = min(n_shards or workers or os.cpu_count(), max(n_essays, 1))
+        bounds = np.linspace(0, n_essays, n_shards + 1).astype(int)
+
+        essays_matrix = characteristic_matrix.tocsc()
+        shards = [essays_matrix[:, head:tail].tocsr() for head, tail in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(workers) as executor:
+            signature = np.hstack(list(executor.map(self.compute_signature_values, shards)))
+
+        if self.signature_bits is not None and self.signature_bits < 32:
+            return BBitSignature(signature, self.signature_bits)
+        return signature
+
+    # Compute the signature of essays given as arrays of 64-bit shingle hashes (see Shingling.hash_essay_shingles),
+    # hashing the shingles themselves instead of their rows in the characteristic matrix. So the signature of an essay
+    # does not depend on the other essays, and essays can be signed in batches, as soon as they are shingled.
+    # The shingles are reduced modulo the prime 2^31 - 1, so (a*x + b) fits in 64 bits; the values are uint32.
+    def compute_shingle_signature(self, essay_shingles):
+        p = self.SHINGLE_PRIME
+        a, b = self.get_hash_coefficients(p)
+        a, b = a[:, None].astype(np.uint64), b[:, None].astype(np.uint64)
+
+        # Essays without shingles keep the largest value, as +infinity
+        signature = np.full((self.sign_number, len(essay_shingles)), np.iinfo(np.uint32).max, dtype=np.uint32)
+        for essay_idx, shingles in enumerate(essay_shingles):
+            if len(shingles):
+                x = np.asarray(shingles, dtype=np.uint64) % np.uint64(p)
+                signature[:, essay_idx] = ((a * x + b) % np.uint64(p)).min(axis=1)
+
+        return signature
+
+    # Get the coefficients a (odd) and b of the sign_number hash functions, for the prime p
+    # They are drawn as a (sign_number, 2) matrix, so the i-th hash function is the same for any sign_number >= i
+    def get_hash_coefficients(self, p):
+        rng = np.random.default_rng(self.seed)
+        coefficients = rng.integers(0, [p // 2, p], size=(self.sign_number, 2))
+        return 2 * coefficients[:, 0] + 1, coefficients[:, 1]
+
+    # Compute the MinHash values of the essays, as a float64 matrix, or a uint32 one for the compressed signatures
+    def compute_signature_values(self, characteristic_matrix):
         # Get the sign_number and the size of the characteristic matrix
         sign_number = self.sign_number
         n_shingles, n_essay = characteristic_matrix.shape
 
-        # Initialize each cell of the signature matrix with +infinity
-        signature = np.full((sign_number, n_essay), np.inf)
+        # Initialize each cell of the signature matrix with +infinity (the largest uint32 for the compressed signatures,
+        # since the hash values are always smaller than the number of shingles)
+        if self.signature_bits is None:
+            signature = np.full((sign_number, n_essay), np.inf)
+        else:
+            signature = np.full((sign_number, n_essay), np.iinfo(np.uint32).max, dtype=np.uint32)
 
         # Choose p as the first prime number after the total number of shingles
-        p = sp.nextprime(n_shingles)
+        p = int(sp.nextprime(n_shingles))
 
         # Choose two vectors of sign_number random values between 0 and p, the total number of shingles.
-        a = 2 * np.random.randint(0, p//2, sign_number) + 1
-        b = np.random.randint(0, p, sign_number)
+        a, b = self.get_hash_coefficients(p)
 
         # Iterate now over the rows of the characteristic_matrix (each rows represent a global shingle)
         for row_idx, essay_idxs in enumerate(characteristic_matrix.tolil().rows):
@@ -134,7 +313,7 @@ class MinHashing:
                     # Update the signature matrix if the result of the specific hash function is less than the current value (the matrix have been set to +infinite)
                     if hashes[hash_fun_res] < current_column[hash_fun_res]:
                         signature[hash_fun_res, essay_idx] = hashes[hash_fun_res]
-        
+
         return signature
     
     # Computes as many hash function as the length of the the arrays "a" and "b", so as many as sign_num
@@ -143,10 +322,73 @@ class MinHashing:
         return ((a*x + b) % p) % m
 
 
+class BBitSignature:
+    """
+    b-bit MinHash signature (Li and König, 2010): only the lowest b bits of each MinHash value are stored, packed in
+    a byte array with a row per essay, so a signature of sign_number values takes sign_number*b/8 bytes per essay.
+    """
+
+    # Number of bits split from the values before packing them, which bounds the temporary memory (one byte per bit)
+    BLOCK_BITS = 1 << 22
+
+    def __init__(self, signature, bits):
+        self.bits = bits
+        self.shape = signature.shape
+        sign_number, n_essays = signature.shape
+        self.packed = np.empty((n_essays, (sign_number * bits + 7) // 8), dtype=np.uint8)
+
+        # Split the lowest b bits of each value and pack them, a row of sign_number*b bits for each essay
+        # The essays are packed in blocks, one bit-plane at a time, so the unpacked bits of the whole signature are never
+        # in memory
+        block_size = max(1, self.BLOCK_BITS // max(1, sign_number * bits))
+        value_bits = np.empty((min(block_size, n_essays), sign_number, bits), dtype=np.uint8)
+        for head in range(0, n_essays, block_size):
+            values = signature[:, head:head + block_size].T
+            block_bits = value_bits[:len(values)]
+            for i in range(bits):
+                block_bits[:, :, i] = (values >> i) & 1
+            self.packed[head:head + len(values)] = np.packbits(block_bits.reshape(len(values), sign_number * bits),
+                                                              axis=1, bitorder='little')
+
+    # Create a b-bit signature from an already packed byte array, e.g. loaded from a file
+    @classmethod
+    def from_packed(cls, packed, bits, shape):
+        signature = cls.__new__(cls)
+        signature.packed, signature.bits, signature.shape = packed, bits, shape
+        return signature
+
+    # Unpack the values of the rows [row_head, row_tail) of the signature, as a (rows, n_essays) matrix
+    # Only the bytes holding the bits of those rows are unpacked
+    def unpack(self, row_head=0, row_tail=None, essays=slice(None)):
+        bits = self.bits
+        row_tail = self.shape[0] if row_tail is None else min(row_tail, self.shape[0])
+        byte_head, bit_offset = divmod(row_head * bits, 8)
+        byte_tail = (row_tail * bits + 7) // 8
+
+        packed_bits = np.unpackbits(self.packed[essays, byte_head:byte_tail], axis=-1, bitorder='little')
+        packed_bits = packed_bits[..., bit_offset:bit_offset + (row_tail - row_head) * bits]
+        values = packed_bits.reshape(*packed_bits.shape[:-1], row_tail - row_head, bits) @ (1 << np.arange(bits, dtype=np.uint32))
+        return values.T
+
+    # Estimate the Jaccard similarity of two essays from the fraction of equal b-bit values
+    # Two different MinHash values collide on their lowest b bits with probability about 1/2^b (if the number of
+    # shingles is much larger than 2^b), so the fraction E of equal values is corrected as (E - 1/2^b) / (1 - 1/2^b)
+    def similarity(self, essay_1, essay_2):
+        values = self.unpack(essays=[essay_1, essay_2])
+        equal_fraction = np.mean(values[:, 0] == values[:, 1])
+
+        collision = 1 / (1 << self.bits)
+        return min(max((equal_fraction - collision) / (1 - collision), 0.0), 1.0)
+
+
 class CompareSignatures:
    
     @staticmethod
     def signature_similarity(signature, essay_1, essay_2):
+        # The b-bit signatures correct their estimate for the collisions of the lowest bits
+        if isinstance(signature, BBitSignature):
+            return signature.similarity(essay_1, essay_2)
+
         # Get the MinHash signatures for the two essays
         signature_1 = signature[:, essay_1]
         signature_2 = signature[:, essay_2]
@@ -166,6 +408,8 @@ class LSH:
     def __init__(self, band_number=100, threshold=0.8):
         self.band_number = band_number
         self.threshold = threshold
+        # Number of candidate pairs of the last search, used for the instrumentation
+        self.candidates_number = 0
 
     def find_candidates_pairs(self, signature):
         # Get signature matrix size
@@ -184,7 +428,10 @@ class LSH:
             # Get the chunk of rows which correspond to a band
             band_head = band_idx*rows_band
             band_tail = (band_idx+1)*rows_band
-            band = signature[band_head: band_tail]
+            if isinstance(signature, BBitSignature):
+                band = signature.unpack(band_head, band_tail)
+            else:
+                band = signature[band_head: band_tail]
 
             # Transpose the band to be able to save them as key and iterate over its columns (so over the essays)
             for essay_idx, column in enumerate(band.T):
@@ -204,10 +451,12 @@ class LSH:
 
         return candidate_pairs
     
-    def find_similar_pairs(self, signature):
+    # Generate the candidate pairs that have a similarity higher than the defined threshold, one at a time, so they can
+    # be streamed to the next stages (e.g. the clustering) as soon as they are verified
+    def generate_similar_pairs(self, signature):
         # Find the candidate pairs by applying LSH algorithm
         candidate_pairs = self.find_candidates_pairs(signature)
-        similar_essays = []
+        self.candidates_number = len(candidate_pairs)
 
         # Select only the candidate pairs that have a similiraty higher then the defined threshold
         for candidate_pair in candidate_pairs:
@@ -216,6 +465,88 @@ class LSH:
             essay_similarity = CompareSignatures.signature_similarity(signature, essay_1, essay_2)
 
             if essay_similarity > self.threshold:
-                similar_essays.append(candidate_pair)
+                yield candidate_pair
 
-        return similar_essays
\ No newline at end of file
+    def find_similar_pairs(self, signature):
+        return list(self.generate_similar_pairs(signature))
+
+    # Group the similar essays in clusters of near duplicates, returning a cluster label for each essay
+    # and the representative essay of each cluster
+    def find_clusters(self, signature):
+        union_find = UnionFind(signature.shape[1])
+        union_find.union_pairs(self.generate_similar_pairs(signature))
+        return union_find.get_clusters()
+
+
+class UnionFind:
+    """
+    Union-find over the essays, backed by NumPy arrays (parent and rank), with path compression and union by rank.
+    Pairs are processed in chunks: the roots of a whole chunk are found at once, and only the pairs that join two
+    different clusters go through the Python union, so at most n_essays - 1 of them over the whole stream.
+    """
+
+    def __init__(self, n_essays):
+        self.parent = np.arange(n_essays, dtype=np.int64)
+        self.rank = np.zeros(n_essays, dtype=np.uint8)
+
+    # Find the root of an essay, compressing the path from it to the root
+    def find(self, essay):
+        parent = self.parent
+        root = essay
+        while parent[root] != root:
+            root = parent[root]
+
+        while parent[essay] != root:
+            parent[essay], essay = root, parent[essay]
+        return root
+
+    # Merge the clusters of two essays, attaching the root with the lower rank to the other one
+    # Returns False if they were already in the same cluster
+    def union(self, essay_1, essay_2):
+        root_1, root_2 = self.find(essay_1), self.find(essay_2)
+        if root_1 == root_2:
+            return False
+
+        if self.rank[root_1] < self.rank[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.parent[root_2] = root_1
+        if self.rank[root_1] == self.rank[root_2]:
+            self.rank[root_1] += 1
+        return True
+
+    # Compress all the paths at once, so that the parent of each essay is its root
+    def compress(self):
+        parent = self.parent
+        grandparent = parent[parent]
+        while not np.array_equal(grandparent, parent):
+            parent[:] = grandparent
+            grandparent = parent[parent]
+
+    # Merge the clusters of all the pairs, given as an iterable of pairs (e.g. a generator) or as a (n, 2) array
+    def union_pairs(self, pairs, chunk_size=1 << 20):
+        if isinstance(pairs, np.ndarray):
+            chunks = (pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size))
+        else:
+            pairs = iter(pairs)
+            chunks = (np.array(chunk, dtype=np.int64).reshape(-1, 2)
+                      for chunk in iter(lambda: list(itertools.islice(pairs, chunk_size)), []))
+
+        for chunk in chunks:
+            # Skip the pairs that are already in the same cluster, without visiting them in Python
+            self.compress()
+            roots_1, roots_2 = self.parent[chunk[:, 0]], self.parent[chunk[:, 1]]
+            different = roots_1 != roots_2
+            for root_1, root_2 in zip(roots_1[different].tolist(), roots_2[different].tolist()):
+                self.union(root_1, root_2)
+
+    # Get the cluster label of each essay, with clusters numbered from 0, and the representative of each cluster,
+    # which is its essay with the smallest index
+    def get_clusters(self):
+        self.compress()
+        _, representatives, labels = np.unique(self.parent, return_index=True, return_inverse=True)
+
+        # Number the clusters in the order of their representatives
+        order = np.argsort(representatives)
+        cluster_ids = np.empty_like(order)
+        cluster_ids[order] = np.arange(len(order))
+        return cluster_ids[labels], representatives[order]
@@ -32,6 +32,28 @@ def extract_data(dataset_file, num_essay=None):
     return essays
 
 
+# Read the essays in batches of batch_size, without loading the whole dataset in memory
+def extract_data_batches(dataset_file, num_essay=None, batch_size=100):
+    dataset_path = join('datasets', dataset_file)
+    essays_read = 0
+
+    with zipfile.ZipFile(dataset_path) as dataset_zipfile:
+        filename = dataset_zipfile.namelist()[0]
+
+        with dataset_zipfile.open(filename) as dataset_file:
+            # read the csv file one chunk at a time, selecting only the "full_text" column
+            for chunk in pd.read_csv(dataset_file, usecols=['full_text'], chunksize=batch_size):
+                essays = chunk['full_text'].tolist()
+                if num_essay is not None:
+                    essays = essays[:num_essay - essays_read]
+                essays_read += len(essays)
+
+                if essays:
+                    yield essays
+                if num_essay is not None and essays_read >= num_essay:
+                    return
+
+
 #Set some specific default values when this script is executed directly (as main)
 if __name__ == '__main__':
     dataset_file = 'persuade_2.0_.zip'
@@ -0,0 +1,101 @@
+import queue
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from classes import BBitSignature
+
+# Objects used by the worker processes, set once by init_worker instead of being sent with every batch
+worker_state = {}
+
+
+def init_worker(dataprocessor, shingling, min_hashing):
+    worker_state.update(dataprocessor=dataprocessor, shingling=shingling, min_hashing=min_hashing)
+
+
+# CPU stages of a batch, run by a worker process: normalize the essays, shingle them and sign them
+# Only the signature of the batch goes back to the main process, together with the number of shingles
+def process_batch(essays):
+    processed_essays = worker_state['dataprocessor'].process_essays(essays)
+    essay_shingles = [np.unique(worker_state['shingling'].hash_essay_shingles(essay)) for essay in processed_essays]
+    signature = worker_state['min_hashing'].compute_shingle_signature(essay_shingles)
+    return signature, sum(len(shingles) for shingles in essay_shingles)
+
+
+class Pipeline:
+    """
+    Pipelined execution of the extract -> normalize -> shingle -> sign stages on batches of essays.
+    A reader thread decompresses and parses the dataset, putting the batches in a bounded queue, while worker processes
+    normalize, shingle and sign the previous batches. Both the queue and the number of batches in the workers are
+    bounded, so a slow stage blocks the previous ones (backpressure) and only a few batches of text are in memory.
+    The CPU stages of a batch run in the same process, so its text is sent between processes only once.
+    Since the essays cannot be numbered in a global characteristic matrix before all of them are read, they are signed
+    with MinHashing.compute_shingle_signature, which hashes the shingles themselves.
+    """
+
+    def __init__(self, dataprocessor, shingling, min_hashing, queue_size=4, workers=None, profiler=None):
+        self.dataprocessor = dataprocessor
+        self.shingling = shingling
+        self.min_hashing = min_hashing
+        self.queue_size = queue_size
+        self.workers = workers
+        self.profiler = profiler
+
+    # Put the batches read from the dataset in the queue, blocking while it is full, and then the end marker.
+    # Errors are passed through the queue too, to be raised by the main thread.
+    def read_batches(self, batches, batch_queue):
+        try:
+            for batch in batches:
+                batch_queue.put(batch)
+            batch_queue.put(None)
+        except Exception as error:
+            batch_queue.put(error)
+
+    # Run the pipeline on an iterable of batches of raw essays (e.g. data_extractor.extract_data_batches),
+    # returning the signature of all the essays, in the order they have been read
+    def run(self, batches):
+        batch_queue = queue.Queue(self.queue_size)
+        reader = threading.Thread(target=self.read_batches, args=(batches, batch_queue), daemon=True)
+        reader.start()
+
+        signatures = []
+        pending = deque()
+        n_shingles = 0
+        with ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                 initargs=(self.dataprocessor, self.shingling, self.min_hashing)) as executor:
+            while True:
+                batch = batch_queue.get()
+                if isinstance(batch, Exception):
+                    raise batch
+                if batch is None:
+                    break
+
+                # Wait for the oldest batch if there are already queue_size batches in the workers
+                if len(pending) >= self.queue_size:
+                    signature, batch_shingles = pending.popleft().result()
+                    signatures.append(signature)
+                    n_shingles += batch_shingles
+                pending.append(executor.submit(process_batch, batch))
+
+            for future in pending:
+                signature, batch_shingles = future.result()
+                signatures.append(signature)
+                n_shingles += batch_shingles
+
+        if self.profiler is not None:
+            self.profiler.count('batches', len(signatures))
+            self.profiler.count('essay_shingles', n_shingles)
+
+        signature = np.hstack(signatures) if signatures else np.empty((self.min_hashing.sign_number, 0), dtype=np.uint32)
+        return self.convert_signature(signature)
+
+    # Convert the uint32 signature to the format of the MinHashing instance, as compute_signature_hash returns it
+    def convert_signature(self, signature):
+        signature_bits = self.min_hashing.signature_bits
+        if signature_bits is None:
+            float_signature = signature.astype(np.float64)
+            float_signature[signature == np.iinfo(np.uint32).max] = np.inf
+            return float_signature
+        elif signature_bits < 32:
+            return BBitSignature(signature, signature_bits)
+        return signature
@@ -1,17 +1,36 @@
+import os
 import sys
 import getopt
-from data_extractor import extract_data
+import numpy as np
+from data_extractor import extract_data, extract_data_batches
 from data_processor import DataProcessor
-from classes import Shingling, MinHashing, LSH
+from classes import Shingling, MinHashing, LSH, UnionFind
+from artifact_cache import ArtifactCache
+from pipeline import Pipeline
+
+# The instrumentation layer is shared by all the homeworks, in the root of the repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import Profiler
 
 #Before: essay_number = 100, shingles_len = 10, sign_number = 100, band_number = 20, threshold = 0.8
 # Here the default values are set.
 dataset_file = 'persuade_2.0_.zip'
 essay_number = 100
 shingles_len = 10
+shingle_type = 'char'
 sign_number = 100
 band_number = 20
 threshold = 0.8
+signature_bits = None
+seed = 0
+workers = 1
+pipelined = False
+batch_size = 100
+cache_dir = 'cache'
+cache_size = 1024
+profile_file = None
+profile_cprofile = False
+profile_memory = False
 
 # The user could insert their own values. If there's any error during the execution, the reason is displayed (except code)
 try:
@@ -19,18 +38,30 @@ try:
         "dataset-file=",
         "essay-number=",
         "shingles-len=",
+        "shingle-type=",
         "sign-number=",
         "band-number=",
-        "threshold="
+        "threshold=",
+        "signature-bits=",
+        "seed=",
+        "workers=",
+        "pipeline",
+        "batch-size=",
+        "cache-dir=",
+        "cache-size=",
+        "no-cache",
+        "profile=",
+        "profile-cprofile",
+        "profile-memory"
     ])
 except getopt.GetoptError:
-    print("Usage: script.py --dataset-file <file> --essay-number <number> --shingles-len <number> --sign-number <number> --band-number <number> --threshold <float>")
+    print("Usage: script.py --dataset-file <file> --essay-number <number> --shingles-len <number> --shingle-type <char|word> --sign-number <number> --band-number <number> --threshold <float> --signature-bits <number> --seed <number> --workers <number> --pipeline --batch-size <number> --cache-dir <dir> --cache-size <MB> --no-cache --profile <file> --profile-cprofile --profile-memory")
     sys.exit(2)
 
 # The values inserted are set
 for opt, arg in opts:
     if opt == '-h':
-        print("Usage: script.py --dataset-file <file> --essay-number <number> --shingles-len <number> --sign-number <number> --band-number <number> --threshold <float>")
+        print("Usage: script.py --dataset-file <file> --essay-number <number> --shingles-len <number> --shingle-type <char|word> --sign-number <number> --band-number <number> --threshold <float> --signature-bits <number> --seed <number> --workers <number> --pipeline --batch-size <number> --cache-dir <dir> --cache-size <MB> --no-cache --profile <file> --profile-cprofile --profile-memory")
         sys.exit()
     elif opt == "--dataset-file":
         dataset_file = arg
@@ -38,35 +69,124 @@ for opt, arg in opts:
         essay_number = int(arg)
     elif opt == "--shingles-len":
         shingles_len = int(arg)
+    elif opt == "--shingle-type":
+        shingle_type = arg
     elif opt == "--sign-number":
         sign_number = int(arg)
     elif opt == "--band-number":
         band_number = int(arg)
     elif opt == "--threshold":
         threshold = float(arg)
+    elif opt == "--signature-bits":
+        signature_bits = int(arg)
+    elif opt == "--seed":
+        seed = int(arg)
+    elif opt == "--workers":
+        workers = int(arg)
+    elif opt == "--pipeline":
+        pipelined = True
+    elif opt == "--batch-size":
+        batch_size = int(arg)
+    elif opt == "--cache-dir":
+        cache_dir = arg
+    elif opt == "--cache-size":
+        cache_size = int(arg)
+    elif opt == "--no-cache":
+        cache_dir = None
+    elif opt == "--profile":
+        profile_file = arg
+    elif opt == "--profile-cprofile":
+        profile_cprofile = True
+    elif opt == "--profile-memory":
+        profile_memory = True
 
 # The inserted/default values are shown to the user
 print("Dataset file:", dataset_file)
 print("Number of essays:", essay_number)
 print("Shingles length:", shingles_len)
+print("Shingle type:", shingle_type)
 print("Number of signature:", sign_number)
 print("Number of bands:", band_number)
 print("Threshold:", threshold)
+print("Signature bits:", signature_bits if signature_bits is not None else 'float64')
+print("Seed:", seed)
+print("Workers:", workers)
+print("Pipeline:", f'batches of {batch_size} essays' if pipelined else 'disabled')
+print("Cache:", f'{cache_dir} ({cache_size} MB)' if cache_dir is not None else 'disabled')
+
+# If a profile file is given, the stages are timed and the counters are written in it as JSON
+profiler = Profiler(profile_file is not None, profile_cprofile, profile_memory)
+profiler.start()
 
 # Classes needed in this program are instanciated with the inserted/default values:
 dataprocessor = DataProcessor()
-shingling = Shingling(shingles_len)
-min_hashing = MinHashing(sign_number)
+shingling = Shingling(shingles_len, shingle_type)
+min_hashing = MinHashing(sign_number, signature_bits, seed)
 lsh = LSH(band_number, threshold)
 
-# Here date are extracted from the .zip, then processed and normalized. Lastly the characteristic_matrix is created
-essays = extract_data(dataset_file, essay_number)
-processed_essays = dataprocessor.process_essays(essays)
-characteristic_matrix = shingling.create_characteristic_matrix(processed_essays)
+# The intermediate results are cached on disk, with keys depending on all the parameters of the stages that produce
+# them, so that changing only the LSH parameters does not extract, process, shingle and sign the essays again
+cache = ArtifactCache(cache_dir, cache_size * 2**20)
+text_key = ArtifactCache.get_key(dataset=ArtifactCache.get_file_id(os.path.join('datasets', dataset_file)),
+                                 essay_number=essay_number, processor=vars(dataprocessor))
+matrix_key = ArtifactCache.get_key(text_key, shingles_len=shingles_len, shingle_type=shingle_type)
+signature_key = ArtifactCache.get_key(matrix_key, sign_number=sign_number, signature_bits=signature_bits, seed=seed,
+                                      pipelined=pipelined)
+
+# Here date are extracted from the .zip, then processed and normalized
+def get_processed_essays():
+    with profiler.stage('extract'):
+        essays = extract_data(dataset_file, essay_number)
+    with profiler.stage('process'):
+        return dataprocessor.process_essays(essays)
+
+# Lastly the characteristic_matrix is created
+def get_characteristic_matrix():
+    processed_essays = cache.get_or_compute('text', text_key, get_processed_essays)
+    with profiler.stage('shingling'):
+        characteristic_matrix = shingling.create_characteristic_matrix(processed_essays)
+    profiler.count('shingles', characteristic_matrix.shape[0])
+    profiler.count('essay_shingles', characteristic_matrix.nnz)
+    return characteristic_matrix
 
-# The signature for the data is created
-signature = min_hashing.compute_signature_hash(characteristic_matrix)
+# The signature for the data is created, splitting the essays among the workers if more than one
+# The hash functions only depend on the seed, so the signature does not depend on the number of workers
+def get_signature():
+    characteristic_matrix = cache.get_or_compute('matrix', matrix_key, get_characteristic_matrix)
+    with profiler.stage('minhashing'):
+        if workers > 1:
+            return min_hashing.compute_signature_parallel(characteristic_matrix, workers=workers)
+        return min_hashing.compute_signature_hash(characteristic_matrix)
+
+# With the pipeline, the essays are read, normalized, shingled and signed concurrently, in batches, and neither the
+# processed essays nor the characteristic matrix are ever created (so they are not cached)
+def get_pipelined_signature():
+    pipeline = Pipeline(dataprocessor, shingling, min_hashing, workers=workers, profiler=profiler)
+    with profiler.stage('pipeline'):
+        return pipeline.run(extract_data_batches(dataset_file, essay_number, batch_size))
+
+with profiler.stage('signature'):
+    signature = cache.get_or_compute('signature', signature_key, get_pipelined_signature if pipelined else get_signature)
+n_essays = signature.shape[1]
+profiler.count('essays', n_essays)
 
 # Similar documents are found by the Locality-Sensitive Hashing algorithms, then displayed to the user
-similar_documents = lsh.find_similar_pairs(signature)
-print('similar documents:', similar_documents)
\ No newline at end of file
+with profiler.stage('lsh'):
+    similar_documents = lsh.find_similar_pairs(signature)
+profiler.count('candidates', lsh.candidates_number)
+profiler.count('similar_pairs', len(similar_documents))
+print('similar documents:', similar_documents)
+
+# The similar documents are grouped in clusters of near duplicates, showing only the clusters with more than one essay
+with profiler.stage('clustering'):
+    union_find = UnionFind(n_essays)
+    union_find.union_pairs(similar_documents)
+    labels, representatives = union_find.get_clusters()
+profiler.count('clusters', len(representatives))
+for cluster_id, representative in enumerate(representatives):
+    essay_idxs = np.flatnonzero(labels == cluster_id)
+    if len(essay_idxs) > 1:
+        print(f'cluster of essay {representative}:', essay_idxs.tolist())
+
+# Write the profile, if requested
+profiler.save(profile_file)
@@ -1,3 +1,4 @@
+import math
 import itertools
 import time
 from collections import defaultdict
@@ -19,6 +20,9 @@ class Apriori:
         # i) itemset and 
         # ii) support count.
         self.L = {}
+        # Statistics of the run: number of candidate k-itemsets, and subsets of the baskets probed in C_k
+        self.candidates_number = {}
+        self.subsets_probed = 0
 
     # Fist count of the itemset
     def first_pass(self, item):
@@ -95,8 +99,10 @@ class Apriori:
             
             # Generate all candidate itemsets
             C_k = self.apriori_gen(self.L[k-1], k)
+            self.candidates_number[k] = len(C_k)
             
             for t in basket_list:
+                self.subsets_probed += math.comb(len(t), k)
                 # Gets all candidate subsets itemsets contained in t
                 C_t = self.get_subsets(C_k, t, k)
                 for c in C_t:
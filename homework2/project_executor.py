@@ -1,7 +1,13 @@
+import os
+import sys
 import time
 import argparse
 from classes import Apriori, AssociationRules
 
+# The instrumentation layer is shared by all the homeworks, in the root of the repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import Profiler
+
 # Create a parser object to handle command-line arguments
 parser = argparse.ArgumentParser(description='Find frequent itemsets and association rules for a given support/confidence')
 
@@ -10,6 +16,9 @@ parser.add_argument('-dataset-file', default='homework2/datasets/T10I4D100K.dat'
 parser.add_argument('-s', default=1000, type=int, help='minimum support a itemset must have to be considered frequent')
 parser.add_argument('-c', default=0.5, type=float, help='minimum confidence a rule must have to be generated')
 parser.add_argument('-verbose', default=True, type=bool, help='decides if the results are printed')
+parser.add_argument('-profile', '--profile', default=None, help='JSON file where stage timers and counters are written')
+parser.add_argument('-profile-cprofile', '--profile-cprofile', default=False, action='store_true', help='add a cProfile capture to the profile')
+parser.add_argument('-profile-memory', '--profile-memory', default=False, action='store_true', help='add a tracemalloc capture to the profile')
 
 # Parse the command-line arguments
 args = parser.parse_args()
@@ -17,14 +26,24 @@ args = parser.parse_args()
 # Print the parsed arguments
 print(args)
 
+# If a profile file is given, the stages are timed and the counters are written in it as JSON
+profiler = Profiler(args.profile is not None, args.profile_cprofile, args.profile_memory)
+profiler.start()
+
 # Get the current time
 t = time.time()
 
 # Create an Apriori object with the given dataset file and minimum support
-apriori = Apriori(datasets=args.dataset_file, s=args.s)
+apriori = Apriori(data=args.dataset_file, s=args.s)
 
 # Run the Apriori algorithm and get the frequent itemsets
-L_k = apriori.algorithm(verbose=args.verbose)
+with profiler.stage('apriori'):
+    L_k = apriori.algorithm(verbose=args.verbose)
+profiler.count('subsets_probed', apriori.subsets_probed)
+for k in apriori.candidates_number:
+    profiler.count(f'candidates_{k}', apriori.candidates_number[k])
+for k in L_k:
+    profiler.count(f'frequent_itemsets_{k}', len(L_k[k]))
 
 # If verbose is True, print the time taken for the first sub problem
 if args.verbose:
@@ -37,8 +56,13 @@ t = time.time()
 associationrules = AssociationRules()
 
 # Find the association rules with the given frequent itemsets and minimum confidence
-rules = associationrules.find(L_k, c=args.c, verbose=args.verbose)
+with profiler.stage('association_rules'):
+    rules = associationrules.find(L_k, c=args.c, verbose=args.verbose)
+profiler.count('rules', len(rules))
 
 # If verbose is True, print the time taken for the second sub problem
 if args.verbose:
-    print("time for sub problem 2",time.time()-t)
\ No newline at end of file
+    print("time for sub problem 2",time.time()-t)
+
+# Write the profile, if requested
+profiler.save(args.profile)
@@ -0,0 +1,72 @@
+import time
+import random
+import argparse
+from collections import defaultdict
+from homework_classes import SubGraph, TriestBase
+
+
+# Reference implementation of update_counters, with three dictionary updates for each shared neighbor
+def reference_update_counters(triest, u, v):
+    if not triest.subgraph.has_node(u) or not triest.subgraph.has_node(v):
+        return
+
+    shared_neighbors = triest.subgraph.get_neighbors(u) & triest.subgraph.get_neighbors(v)
+    for neighbour in shared_neighbors:
+        triest.global_counter += 1
+        triest.local_counters[neighbour] += 1
+        triest.local_counters[u]         += 1
+        triest.local_counters[v]         += 1
+
+
+# Create a synthetic graph where a few hub nodes are connected to a large fraction of the other nodes
+def create_hub_graph(n_nodes, n_hubs, hub_degree, n_edges):
+    subgraph = SubGraph()
+    for hub in range(n_hubs):
+        for u in random.sample(range(n_hubs, n_nodes), hub_degree):
+            subgraph.add_edge(hub, u)
+
+    # Add some random edges between the hubs and the other nodes
+    while len(subgraph.edges) < n_edges:
+        u, v = sorted(random.sample(range(n_nodes), 2))
+        subgraph.add_edge(u, v)
+    return subgraph
+
+
+# Time the update of the counters for each of the queried edges, returning the elapsed time and the global counter
+def time_update_counters(subgraph, edges, update_counters, track_local=True):
+    triest = TriestBase(len(subgraph.edges), track_local=track_local)
+    triest.subgraph = subgraph
+    triest.local_counters = defaultdict(int)
+
+    start_time = time.perf_counter()
+    for u, v in edges:
+        update_counters(triest, u, v)
+    return time.perf_counter() - start_time, triest.global_counter
+
+
+# When this file is directly executed, compare the reference and the optimized update of the counters
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmark of TriestBase.update_counters on graphs with hub nodes.')
+    parser.add_argument('-nodes', default=20000, type=int, help='number of nodes of the synthetic graph')
+    parser.add_argument('-hubs', nargs='+', default=[2, 10, 50], type=int, help='number of hub nodes to benchmark')
+    parser.add_argument('-hub-degree', default=5000, type=int, help='degree of each hub node')
+    parser.add_argument('-queries', default=5000, type=int, help='number of edges whose counters are updated')
+    args = parser.parse_args()
+
+    random.seed(0)
+    for n_hubs in args.hubs:
+        subgraph = create_hub_graph(args.nodes, n_hubs, args.hub_degree, n_hubs * args.hub_degree * 2)
+
+        # Query edges between pairs of hubs and between hubs and normal nodes, which share many neighbors
+        edges = [tuple(sorted(random.sample(range(n_hubs), 2))) if n_hubs > 1 and i % 2 else (random.randrange(n_hubs), random.randrange(n_hubs, args.nodes))
+                 for i in range(args.queries)]
+
+        reference_time, reference_count = time_update_counters(subgraph, edges, reference_update_counters)
+        optimized_time, optimized_count = time_update_counters(subgraph, edges, lambda triest, u, v: triest.update_counters('+', u, v))
+        global_time, global_count = time_update_counters(subgraph, edges, lambda triest, u, v: triest.update_counters('+', u, v), False)
+        assert reference_count == optimized_count == global_count
+
+        print(f'hubs: {n_hubs}, shared neighbors: {reference_count}')
+        print(f'  reference: {reference_time:.3f}s')
+        print(f'  optimized: {optimized_time:.3f}s ({reference_time / optimized_time:.1f}x)')
+        print(f'  global only: {global_time:.3f}s ({reference_time / global_time:.1f}x)')
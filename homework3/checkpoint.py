@@ -0,0 +1,93 @@
+import os
+import json
+import struct
+from array import array
+
+
+# Every checkpoint starts with a fixed header:
+# magic, format version, class name length, M, t, edges read, uncompensated deletions (d_i, d_o),
+# number of sampled edges, number of local counters, global counter, length of the random state
+HEADER = struct.Struct('<4sBBqqqqqqqdq')
+MAGIC = b'TRST'
+VERSION = 4
+
+
+# Store the reservoir, the counters and the random state of a TRIEST instance in a compact binary file
+def save_checkpoint(triest, checkpoint_file):
+    class_name = type(triest).__name__.encode('ascii')
+
+    # Flatten the sampled edges and the local counters into typed arrays (8 bytes per value)
+    edges = array('q')
+    for u, v in triest.subgraph.get_edges():
+        edges.append(u)
+        edges.append(v)
+    local_nodes = array('q', triest.local_counters.keys())
+    local_values = array('d', triest.local_counters.values())
+    # Errors of the top-k counters (see TopKCounters), all zero for plain local counters
+    local_errors = getattr(triest.local_counters, 'errors', {})
+    local_errors = array('d', (local_errors.get(u, 0) for u in local_nodes))
+
+    # The state of the random stream is saved too (as JSON, since it depends on the bit generator), so that a restored
+    # run continues the same random sequence. The edges are saved in the order used to draw them.
+    random_state = json.dumps(triest.random.get_state()).encode('ascii')
+
+    # Write on a temporary file and then replace the old checkpoint, so a crash never leaves a truncated checkpoint
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(class_name), triest.M, triest.t, triest.edges_read,
+                            getattr(triest, 'd_i', 0), getattr(triest, 'd_o', 0),
+                            len(edges) // 2, len(local_nodes), triest.global_counter, len(random_state)))
+        f.write(class_name)
+        edges.tofile(f)
+        local_nodes.tofile(f)
+        local_values.tofile(f)
+        local_errors.tofile(f)
+        f.write(random_state)
+    os.replace(tmp_file, checkpoint_file)
+
+
+# Restore a TRIEST instance from a checkpoint written by save_checkpoint
+def load_checkpoint(triest, checkpoint_file):
+    with open(checkpoint_file, 'rb') as f:
+        magic, version, name_len, M, t, edges_read, d_i, d_o, n_edges, n_local, global_counter, random_state_len = HEADER.unpack(f.read(HEADER.size))
+
+        # Make sure the file is a checkpoint and that it was created by the same algorithm
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{checkpoint_file} is not a valid TRIEST checkpoint')
+        class_name = f.read(name_len).decode('ascii')
+        if class_name != type(triest).__name__:
+            raise ValueError(f'{checkpoint_file} was created by {class_name}, not by {type(triest).__name__}')
+
+        # Read back the typed arrays in the same order they have been written
+        edges, local_nodes, local_values, local_errors = array('q'), array('q'), array('d'), array('d')
+        edges.fromfile(f, 2 * n_edges)
+        local_nodes.fromfile(f, n_local)
+        local_values.fromfile(f, n_local)
+        local_errors.fromfile(f, n_local)
+        random_state = json.loads(f.read(random_state_len))
+
+    # Rebuild the reservoir directly, without going through SubGraph.add_edge (and its verbose prints)
+    triest.M, triest.t, triest.edges_read = M, t, edges_read
+    if hasattr(triest, 'd_i'):
+        triest.d_i, triest.d_o = d_i, d_o
+    subgraph = triest.subgraph
+    subgraph.adj_elem.clear()
+    subgraph.edges.clear()
+    subgraph.edge_list.clear()
+    for i in range(0, len(edges), 2):
+        u, v = edges[i], edges[i + 1]
+        subgraph.adj_elem[u].add(v)
+        subgraph.adj_elem[v].add(u)
+        subgraph.edges[(u, v)] = len(subgraph.edge_list)
+        subgraph.edge_list.append((u, v))
+
+    # Counters are stored as doubles, so they are converted back to the type used by the algorithm
+    counter_type = triest.counter_type
+    triest.global_counter = counter_type(global_counter)
+    triest.local_counters.clear()
+    for u, value in zip(local_nodes, local_values):
+        triest.local_counters[u] = counter_type(value)
+    if hasattr(triest.local_counters, 'errors'):
+        triest.local_counters.errors.update((u, counter_type(error)) for u, error in zip(local_nodes, local_errors) if error)
+
+    triest.random.set_state(random_state)
@@ -36,6 +36,45 @@ def extract_data(dataset_file):
                 yield src_node, dst_node
 
 
+# Extract a fully dynamic edge stream, where each line is "+ u v" (insertion) or "- u v" (deletion)
+# Lines with only the two nodes are considered insertions, so the static SNAP datasets can be read too
+def extract_dynamic_data(dataset_file):
+    dataset_path = join('datasets', dataset_file)
+
+    # Read the file GZip containing the stream of events
+    with gzip.open(dataset_path) as zipped_file:
+
+        # Iterate on the file, for each line:
+        for line in zipped_file:
+
+            # Get the individual words of the file
+            line  = line.decode('utf-8')
+            words = line.split()
+
+            # Skip the line if it is empty or a comment
+            if not words or words[0] == '#' or words[0] == '%':
+                continue
+
+            # Get the operation of the event, by default an insertion
+            operation = '+'
+            if words[0] == '+' or words[0] == '-':
+                operation = words.pop(0)
+
+            # Cast the two words into numbers (node numbers)
+            src_node, dst_node = int(words[0]), int(words[1])
+
+            # If it is an self-edge, removes it
+            if src_node == dst_node:
+                continue
+
+            # If the source number is higher than the destination number, exchange the two nodes
+            elif src_node > dst_node:
+                dst_node, src_node = src_node, dst_node
+
+            # The two nodes and the operation are saved to be used in a generator, in the order of TriestFD.process_edge
+            yield src_node, dst_node, operation
+
+
 # When this file is directly executed, extract the data and print each edge between each pair of nodes
 if __name__ == '__main__':
     dataset_file = 'web-Stanford.txt.gz'
@@ -1,5 +1,6 @@
 import matplotlib.pyplot as plt
 from homework_classes import TriestBase, TriestImpr
+from exact_counter import exact_triangles
 
 
 # Create an image containing the plotted results of a certain algorithm over a specified dataset
@@ -28,13 +29,15 @@ def draw_plot(triest_class, plot_title, dataset_file, m_values, triangle_count):
 # When this file is directly executed, both the algorithms are called, with a list of 7 different sampling numbers.
 if __name__ == '__main__':
 
-    # An entry of the dictionary is added, having as Value: ([Sampling Values], Real Triangles of the network)
+    # An entry of the dictionary is added, having as Value: [Sampling Values]
     dataset_files = {
-        'web-Stanford.txt.gz': ([5000, 7500, 10000, 15000, 20000, 25000, 40000], 11329473)
+        'web-Stanford.txt.gz': [5000, 7500, 10000, 15000, 20000, 25000, 40000]
         # additional entry can be added here, for examples on different datasets,
     }
 
     # Call draw_plot on both the algorithms, for each entry of the dictionary
-    for dataset_file, (m_values, triangle_count) in dataset_files.items():
+    for dataset_file, m_values in dataset_files.items():
+        # The real triangles of the network are counted exactly (and cached) to compare them with the estimates
+        triangle_count, _, _ = exact_triangles(dataset_file)
         draw_plot(TriestBase, 'Triest Base Estimates', dataset_file, m_values, triangle_count)
         draw_plot(TriestImpr, 'Triest Improved Estimates', dataset_file, m_values, triangle_count)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import os
+import itertools
+import numpy as np
+from os.path import join
+from scipy import sparse
+from data_extractor import extract_data
+
+
+# Maximum number of wedges (paths of length two) materialized at once by the sparse products
+WEDGES_PER_BLOCK = 2**24
+
+
+# Load the edge stream of a dataset into two arrays of source and destination nodes
+def load_edges(dataset_file):
+    edges = np.fromiter(itertools.chain.from_iterable(extract_data(dataset_file)), dtype=np.int64)
+    return edges[0::2], edges[1::2]
+
+
+# Orient each undirected edge from the lower to the higher ranked node, where nodes are ranked by (degree, id)
+# Every node ends up with at most O(sqrt(E)) out-neighbors, which bounds the cost of the intersections
+def get_oriented_matrix(src_nodes, dst_nodes, n_nodes):
+    # Remove self-edges and duplicated edges, keeping the smaller node first as done by extract_data
+    src_nodes, dst_nodes = np.minimum(src_nodes, dst_nodes), np.maximum(src_nodes, dst_nodes)
+    not_loop = src_nodes != dst_nodes
+    A = sparse.csr_matrix((np.ones(not_loop.sum(), dtype=np.int8), (src_nodes[not_loop], dst_nodes[not_loop])),
+                          shape=(n_nodes, n_nodes)).tocoo()
+    src_nodes, dst_nodes = A.row.astype(np.int64), A.col.astype(np.int64)
+
+    # Rank the nodes by degree, breaking the ties with the node id
+    degree = np.bincount(src_nodes, minlength=n_nodes) + np.bincount(dst_nodes, minlength=n_nodes)
+    rank = np.empty(n_nodes, dtype=np.int64)
+    rank[np.lexsort((np.arange(n_nodes), degree))] = np.arange(n_nodes)
+
+    # Swap the endpoints of the edges going from an higher to a lower ranked node
+    swap = rank[src_nodes] > rank[dst_nodes]
+    src_nodes, dst_nodes = np.where(swap, dst_nodes, src_nodes), np.where(swap, src_nodes, dst_nodes)
+
+    # Create the oriented adjacency matrix
+    data = np.ones(len(src_nodes), dtype=np.int32)
+    return sparse.csr_matrix((data, (src_nodes, dst_nodes)), shape=(n_nodes, n_nodes))
+
+
+# Split the rows of a matrix in consecutive blocks, so that each block produces at most WEDGES_PER_BLOCK wedges
+def get_row_blocks(row_wedges):
+    block_ids = np.cumsum(row_wedges) // WEDGES_PER_BLOCK
+    bounds = np.flatnonzero(np.diff(block_ids)) + 1
+    return zip(np.r_[0, bounds], np.r_[bounds, len(row_wedges)])
+
+
+# Count exactly the triangles of an undirected graph, globally and for each node
+# Each triangle u -> w -> v (with u -> v) is counted once, by intersecting the out-neighbors of its nodes with sparse products
+def count_triangles(src_nodes, dst_nodes):
+    # Relabel the nodes with consecutive ids, so that the matrices have no empty rows
+    node_ids, labels = np.unique(np.concatenate((src_nodes, dst_nodes)), return_inverse=True)
+    n_nodes, n_edges = len(node_ids), len(src_nodes)
+    A = get_oriented_matrix(labels[:n_edges], labels[n_edges:], n_nodes)
+    A_t = A.T.tocsr()
+
+    local_triangles = np.zeros(n_nodes, dtype=np.int64)
+    out_degree = np.diff(A.indptr)
+
+    # Triangles where a node is the lowest (u) or the highest (v) ranked vertex:
+    # (A @ A)[u, v] counts the wedges u -> w -> v, which are triangles only if u -> v too
+    for head, tail in get_row_blocks(A @ out_degree):
+        closed = (A[head:tail] @ A).multiply(A[head:tail]).tocoo()
+        local_triangles[head:tail] += np.bincount(closed.row, weights=closed.data, minlength=tail - head).astype(np.int64)
+        local_triangles += np.bincount(closed.col, weights=closed.data, minlength=n_nodes).astype(np.int64)
+
+    # Triangles where a node is the middle vertex (w):
+    # (A.T @ A)[w, v] counts the nodes u with u -> w and u -> v, which are triangles only if w -> v too
+    for head, tail in get_row_blocks(A_t @ out_degree):
+        closed = (A_t[head:tail] @ A).multiply(A[head:tail])
+        local_triangles[head:tail] += np.asarray(closed.sum(axis=1), dtype=np.int64).ravel()
+
+    # Each triangle has exactly one lowest, one middle and one highest vertex
+    global_triangles = int(local_triangles.sum() // 3)
+    return global_triangles, node_ids, local_triangles
+
+
+# Count the triangles of a dataset, caching the results next to the dataset itself
+# The cache is invalidated whenever the dataset file is modified
+def exact_triangles(dataset_file, use_cache=True):
+    dataset_path = join('datasets', dataset_file)
+    cache_path = dataset_path + '.triangles.npz'
+    dataset_stat = os.stat(dataset_path)
+    dataset_key = np.array([dataset_stat.st_size, dataset_stat.st_mtime_ns], dtype=np.int64)
+
+    # If the cache is still valid, return its results
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as cache:
+            if np.array_equal(cache['dataset_key'], dataset_key):
+                return int(cache['global_triangles']), cache['node_ids'], cache['local_triangles']
+
+    # Otherwise, count the triangles and store the results in the cache
+    global_triangles, node_ids, local_triangles = count_triangles(*load_edges(dataset_file))
+    if use_cache:
+        np.savez(cache_path, dataset_key=dataset_key, global_triangles=global_triangles,
+                 node_ids=node_ids, local_triangles=local_triangles)
+
+    return global_triangles, node_ids, local_triangles
+
+
+# When this file is directly executed, count the triangles of the stanford web-graph
+if __name__ == '__main__':
+    dataset_file = 'web-Stanford.txt.gz'
+    global_triangles, _, _ = exact_triangles(dataset_file)
+    print(f'Global triangles: {global_triangles}')
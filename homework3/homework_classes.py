@@ -1,20 +1,25 @@
-import random
+import math
+import heapq
 import itertools
+import numpy as np
 from collections import defaultdict
-from data_extractor import extract_data
+from data_extractor import extract_data, extract_dynamic_data
+from checkpoint import save_checkpoint, load_checkpoint
 
 
 class SubGraph:
     """
     Represents the subgraph G containing only the edges of a specific sample S.
-    This is implented thanks to adjacency lists and and a set of edges.
+    This is implented thanks to adjacency lists and and a list of edges, indexed by a dictionary (edge, position),
+    so that a random edge can be drawn and removed in constant time, always in the same order for the same stream.
     """
 
-    # Initializes the SubGraph instance, with an empty dictionary of adjacency list and an empty set of edges
+    # Initializes the SubGraph instance, with an empty dictionary of adjacency list and an empty list of edges
     def __init__(self, verbose=False):
         self.verbose = verbose
         self.adj_elem = defaultdict(set)
-        self.edges = set()
+        self.edges = {}
+        self.edge_list = []
 
 
     # Add an edge to the graph
@@ -24,8 +29,9 @@ class SubGraph:
         self.adj_elem[u].add(v)
         self.adj_elem[v].add(u)
 
-        # Add the edge to the set of edges
-        self.edges.add((u, v))
+        # Add the edge at the end of the list of edges
+        self.edges[(u, v)] = len(self.edge_list)
+        self.edge_list.append((u, v))
 
         # If the tag verbose, print the addition of the edge
         if self.verbose:
@@ -39,8 +45,12 @@ class SubGraph:
         self.adj_elem[u].remove(v)
         self.adj_elem[v].remove(u)
 
-        # Remove the edge from the set of edges
-        self.edges.remove((u, v))
+        # Remove the edge from the list of edges, moving the last edge in its position
+        position = self.edges.pop((u, v))
+        last_edge = self.edge_list.pop()
+        if position < len(self.edge_list):
+            self.edge_list[position] = last_edge
+            self.edges[last_edge] = position
 
         # If the tag is verbose, print the removal of the edge
         if self.verbose:
@@ -71,7 +81,12 @@ class SubGraph:
 
     # Get the edges of the subgraph
     def get_edges(self):
-        return list(self.edges)
+        return list(self.edge_list)
+
+
+    # Get the edge at a random position, given a uniform random number in [0, 1)
+    def get_random_edge(self, uniform):
+        return self.edge_list[int(uniform * len(self.edge_list))]
  
 
     # Get the adjacency list of the node u (all its neighbors)
@@ -80,55 +95,224 @@ class SubGraph:
 
 
 
+class TopKCounters:
+    """
+    Represents the local counters of only the (approximate) top-k nodes, using the space-saving sketch.
+    It behaves as a defaultdict(int), so it can replace the local counters without changing the algorithms.
+    A node that replaces another one inherits its counter, which is kept as the error of the new node: the counter
+    overestimates the count of the node by at most its error, and counter - error underestimates it.
+    With N the sum of all the increments (three times the triangles counted), every error is at most N/k.
+    """
+
+    # Initializes the TopKCounters instance, with empty dictionaries of counters and errors and an empty heap of
+    # (counter, node). Only the nodes that replaced another one have an error.
+    def __init__(self, k):
+        self.k = k
+        self.counters = {}
+        self.errors = {}
+        self.heap = []
+
+
+    # Get the counter of the node u, or zero if the node is not tracked
+    def __getitem__(self, u):
+        return self.counters.get(u, 0)
+
+
+    # Set the counter of the node u. If it is not tracked and the sketch is full, it replaces the node with the
+    # smallest counter, inheriting its counter (as value is the increment over the zero returned by __getitem__)
+    # as its error
+    def __setitem__(self, u, value):
+        if u not in self.counters and len(self.counters) >= self.k:
+            # Decrements of nodes that are not tracked are ignored
+            if value <= 0:
+                return
+
+            min_counter, min_node = self.pop_min()
+            del self.counters[min_node]
+            self.errors.pop(min_node, None)
+            self.errors[u] = min_counter
+            value += min_counter
+
+        self.counters[u] = value
+        heapq.heappush(self.heap, (value, u))
+
+        # The heap contains also outdated entries, so it is rebuilt when it becomes too large
+        if len(self.heap) > 4 * self.k:
+            self.heap = [(counter, node) for node, counter in self.counters.items()]
+            heapq.heapify(self.heap)
+
+
+    # Remove the node u from the tracked nodes, if present
+    def __delitem__(self, u):
+        self.counters.pop(u, None)
+        self.errors.pop(u, None)
+
+
+    # Return true if the node u is tracked, false otherwise
+    def __contains__(self, u):
+        return u in self.counters
+
+
+    # Return the number of tracked nodes
+    def __len__(self):
+        return len(self.counters)
+
+
+    # Return the (counter, node) pair with the smallest counter, skipping the outdated entries of the heap
+    def pop_min(self):
+        while True:
+            counter, u = heapq.heappop(self.heap)
+            if self.counters.get(u) == counter:
+                return counter, u
+
+
+    # Get the tracked nodes, their counters or both, as a dictionary would do
+    def keys(self):
+        return self.counters.keys()
+
+    def values(self):
+        return self.counters.values()
+
+    def items(self):
+        return self.counters.items()
+
+
+    # Get the tracked nodes with their counters minus their errors, the counts that are guaranteed for them
+    def guaranteed_items(self):
+        errors = self.errors
+        return ((u, max(counter - errors.get(u, 0), 0)) for u, counter in self.counters.items())
+
+
+    # Remove all the tracked nodes
+    def clear(self):
+        self.counters.clear()
+        self.errors.clear()
+        self.heap.clear()
+
+
+
+class RandomStream:
+    """
+    Stream of uniform random numbers in [0, 1), drawn in blocks from a NumPy Generator, since drawing them one at a
+    time from NumPy is much slower than from the random module.
+    The state of the stream is the state of the Generator before the current block and the position in the block,
+    so a stream restored from a checkpoint continues with the same numbers.
+    """
+
+    BLOCK_SIZE = 4096
+
+    # seed can be anything accepted by numpy.random.default_rng, such as an int or a SeedSequence
+    def __init__(self, seed=None):
+        self.generator = np.random.default_rng(seed)
+        self.draw_block()
+
+    # Draw a new block of random numbers, saving the state of the Generator before it
+    def draw_block(self):
+        self.block_state = self.generator.bit_generator.state
+        self.block = self.generator.random(self.BLOCK_SIZE).tolist()
+        self.position = 0
+
+    # Get the next random number of the stream
+    def random(self):
+        if self.position == self.BLOCK_SIZE:
+            self.draw_block()
+        self.position += 1
+        return self.block[self.position - 1]
+
+    def get_state(self):
+        return {'generator': self.block_state, 'position': self.position}
+
+    def set_state(self, state):
+        self.generator.bit_generator.state = state['generator']
+        self.draw_block()
+        self.position = state['position']
+
+
+
+# Return the k nodes with the highest local estimate as an array of (node, estimate), sorted by decreasing estimate
+def get_top_local_estimates(local_estimates, k):
+    nodes = np.fromiter(local_estimates.keys(), dtype=np.int64, count=len(local_estimates))
+    estimates = np.fromiter(local_estimates.values(), dtype=np.int64, count=len(local_estimates))
+
+    # Select the k highest estimates in linear time, then sort only them
+    if len(estimates) > k:
+        top_idxs = np.argpartition(estimates, -k)[-k:]
+        nodes, estimates = nodes[top_idxs], estimates[top_idxs]
+    order = np.argsort(-estimates, kind='stable')
+
+    return np.column_stack((nodes[order], estimates[order]))
+
+
+
 class TriestBase:
     """
     Implementation of the Triest-Base Algorithm
     """
 
+    # Counters of Triest Base only count triangles, so they are integers
+    counter_type = int
+
+    # Function reading the stream of the dataset file, and name of its elements in the printed snapshots
+    extract_stream = staticmethod(extract_data)
+    stream_name = 'Edges'
+
     # Initialize the instance of TriestBase, and its attributes, with default or passed values
-    def __init__(self, M, verbose=False):
+    def __init__(self, M, verbose=False, top_k=None, track_local=True, seed=None):
         self.M = M
         self.verbose = verbose
         self.subgraph = SubGraph(verbose)
         self.global_counter = 0
-        self.local_counters = defaultdict(int)
+        # If track_local is false, only the global counter is updated
+        self.track_local = track_local
+        # If top_k is set, only the local counters of the (approximate) top-k nodes are kept in memory
+        self.top_k = top_k
+        self.local_counters = TopKCounters(top_k) if top_k else defaultdict(int)
+        # t counts the edges considered by the algorithm, edges_read all the edges read from the stream
+        self.t = 0
+        self.edges_read = 0
+        # Number of edges removed from the sample to make room for new ones
+        self.edges_evicted = 0
+        # Random numbers are drawn from a stream seeded with seed, independent from the global random state
+        self.random = RandomStream(seed)
 
     # Update global and local counters according to the passed operator (+ or -)
     def update_counters(self, operator, u, v):
-        # Ensure that both nodes this edge leads to are in the subgraph
-        if not self.subgraph.has_node(u) or not self.subgraph.has_node(v):
-            return
-
-        # Get neighbors of nodes u and v in the subgraph
+        # Get neighbors of nodes u and v in the subgraph, ensuring that both nodes this edge leads to are in the subgraph
         neighbors_u = self.subgraph.get_neighbors(u)
         neighbors_v = self.subgraph.get_neighbors(v)
+        if not neighbors_u or not neighbors_v:
+            return
 
-        # Find the shared neighbors between u and v
+        # Find the shared neighbors between u and v (the intersection iterates the smaller set, probing the larger one)
         shared_neighbors = neighbors_u & neighbors_v
+        if not shared_neighbors:
+            return
 
         # Determine the increment value based on the operator
-        incr_value = 0
-        if operator == '+':
-            incr_value = 1
-        else:
-            incr_value = -1
+        incr_value = 1 if operator == '+' else -1
+        shared_incr = incr_value * len(shared_neighbors)
+
+        # Update the global counter once for all the shared neighbors
+        self.global_counter += shared_incr
+
+        # If only the global count is needed, the local counters are not updated at all
+        if not self.track_local:
+            return
 
-        # Update the global/local counters for each shared neighbor
+        # Update local counters for each shared neighbor, and for u and v once for all the shared neighbors
+        local_counters = self.local_counters
         for neighbour in shared_neighbors:
-            # Update global counter
-            self.global_counter += incr_value
-            # Update local counters for shared neighbor, u, and v
-            self.local_counters[neighbour] += incr_value
-            self.local_counters[u]         += incr_value
-            self.local_counters[v]         += incr_value
+            local_counters[neighbour] += incr_value
+        local_counters[u] += shared_incr
+        local_counters[v] += shared_incr
 
         # If the operator is '-', delete local counters containing a value of 0
         if operator == '-':
             # Iterate over shared neighbors, u, and v
             for neighbour in itertools.chain(shared_neighbors, (u, v)):
                 # Check if local counter is 0 and delete if true
-                if not self.local_counters[neighbour]:
-                    del self.local_counters[neighbour]
+                if not local_counters[neighbour]:
+                    del local_counters[neighbour]
 
 
     # Returns true or false depending whether it is possible to add the node or not to the graph
@@ -138,14 +322,14 @@ class TriestBase:
             return True
 
         # If not, try to flip a coin, with unequal probability M/t of getting an head
-        elif random.random() < (self.M / t):
+        elif self.random.random() < (self.M / t):
 
             # Obtain a random edge from the set of edges
-            edge_list = self.subgraph.get_edges()
-            w, z = random.choice(edge_list)
+            w, z = self.subgraph.get_random_edge(self.random.random())
 
             # remove the sampled edge from subgraph
             self.subgraph.remove_edge(w, z)
+            self.edges_evicted += 1
             self.update_counters('-', w, z)
             return True
 
@@ -157,92 +341,148 @@ class TriestBase:
         return max(1, int(t)*(int(t)-1)*(int(t)-2) / (self.M*(self.M-1)*(self.M-2)))
 
 
-    # This is the main function of the class
-    # It implements the algorithm for Triest Base
-    def algorithm(self, dataset_file):
+    # Process a single edge of the stream, updating the sample and the counters
+    def process_edge(self, u, v):
+        self.edges_read += 1
 
-        # Extract the edge stream from the dataset file and initialize t
-        edge_stream = extract_data(dataset_file)
-        t = 0
+        # Skip self-edges and keep the smaller node first, as done by extract_data
+        if u == v:
+            return
+        elif u > v:
+            u, v = v, u
 
-        # Iterate over each edge in the edge stream
-        for u, v in edge_stream:
-            # Make sure this edge is not present in our subgraph
-            if self.subgraph.has_edge(u, v):
-                continue
+        # Make sure this edge is not present in our subgraph
+        if self.subgraph.has_edge(u, v):
+            return
 
-            t += 1
+        self.t += 1
 
-            # If the edge can be added (t < M or t/M probability of getting head)
-            if self.sample_edge(t):
-                # Add the edge to the subgraph
-                self.subgraph.add_edge(u, v)
+        # If the edge can be added (t < M or t/M probability of getting head)
+        if self.sample_edge(self.t):
+            # Add the edge to the subgraph
+            self.subgraph.add_edge(u, v)
+
+            # Update the counters for the added edge
+            self.update_counters('+', u, v)
+
+
+    # Return the current estimate of the global triangle count
+    def estimate(self):
+        return int(self.calculate_eta(self.t) * self.global_counter)
+
+
+    # Return the local counters, as (node, counter) pairs
+    # With the top-k sketch, the counters inherited from the replaced nodes are subtracted (see TopKCounters)
+    def local_counter_items(self):
+        if self.top_k:
+            return self.local_counters.guaranteed_items()
+        return self.local_counters.items()
+
+
+    # Return the current estimate of the local triangle count of each node
+    def local_estimates(self):
+        eta_t = self.calculate_eta(self.t)
+        return {u: int(eta_t * counter) for u, counter in self.local_counter_items()}
+
+
+    # Return the k nodes with the highest local triangle estimate, as an array of (node, estimate)
+    def top_local_estimates(self, k=None):
+        return get_top_local_estimates(self.local_estimates(), k or self.top_k or len(self.local_counters))
+
+
+    # Process the edge stream, yielding (edges read, estimate) every snapshot_every edges
+    # If a checkpoint file is given, the state is also saved there at every snapshot
+    def stream_estimates(self, edge_stream, snapshot_every, checkpoint_file=None):
+        for edge in edge_stream:
+            self.process_edge(*edge)
+
+            if self.edges_read % snapshot_every == 0:
+                if checkpoint_file is not None:
+                    self.save_checkpoint(checkpoint_file)
+                yield self.edges_read, self.estimate()
 
-                # Update the counters for the added edge
-                self.update_counters('+', u, v)
 
-        # Compute the estimate for the global/local triangle counts
-        eta_t = self.calculate_eta(t)
-        global_triangles = int(eta_t * self.global_counter)
+    # Save the sample and the counters, so that the algorithm can be restarted later
+    def save_checkpoint(self, checkpoint_file):
+        save_checkpoint(self, checkpoint_file)
+
+
+    # Restore the sample and the counters saved by save_checkpoint
+    def load_checkpoint(self, checkpoint_file):
+        load_checkpoint(self, checkpoint_file)
+
+
+    # This is the main function of the class
+    # It implements the algorithm for Triest Base, and for the other versions through the methods they override
+    def algorithm(self, dataset_file, snapshot_every=None, checkpoint_file=None):
+
+        # Extract the edge stream from the dataset file, skipping the edges already read before a checkpoint
+        edge_stream = itertools.islice(self.extract_stream(dataset_file), self.edges_read, None)
+
+        # Iterate over each edge in the edge stream, printing the anytime estimates if requested
+        if snapshot_every:
+            for edges_read, estimate in self.stream_estimates(edge_stream, snapshot_every, checkpoint_file):
+                print(f'{self.stream_name} read: {edges_read}, global triangles estimate: {estimate}')
+        else:
+            for edge in edge_stream:
+                self.process_edge(*edge)
+
+        # Compute the estimate for the global triangle count
+        global_triangles = self.estimate()
 
         # Print results
         print(f'M: {self.M}, dataset_name: {dataset_file}')
         print(f'Global triangles estimate: {global_triangles}')
 
-        # If verbose mode is enabled, print local triangles estimate
-        if self.verbose:
-            # Create a new empty dictionary
-            local_triangles = {}
-
-            # Iterate over each node and its counter in local_counters
-            for u, counter in self.local_counters.items():
-                # Calculate the local triangles estimate for the current node u
-                local_triangles[u] = int(eta_t * counter)
-
-            print(f'Local triangles estimate: {local_triangles}')
+        # If verbose mode is enabled, print local triangles estimate (only of the top-k nodes, if requested)
+        if self.verbose and self.top_k:
+            print(f'Top-{self.top_k} local triangles estimate: {self.top_local_estimates().tolist()}')
+        elif self.verbose:
+            print(f'Local triangles estimate: {self.local_estimates()}')
 
         return global_triangles
     
 
 
-class TriestImpr:
+class TriestImpr(TriestBase):
     """
     Implementation of the Triest Improved Algorithm
     """
 
-    # Initialize the instance of TriestImproved, and its attributes, with default or passed values
-    def __init__(self, M, verbose=False):
-        self.M = M
-        self.verbose = verbose
-        self.subgraph = SubGraph(verbose)
-        self.global_counter = 0
-        self.local_counters = defaultdict(int)
+    # Counters of Triest Improved are incremented by eta(t), so they are floats
+    counter_type = float
 
 
     # Update global and local counters according to the passed operator (+ or -)
     def update_counters(self, t, u, v):
-        # Ensure that both nodes this edge leads to are in the subgraph
-        if not self.subgraph.has_node(u) or not self.subgraph.has_node(v):
-            return
-
-        # Get neighbors of nodes u and v in the subgraph
+        # Get neighbors of nodes u and v in the subgraph, ensuring that both nodes this edge leads to are in the subgraph
         neighbors_u = self.subgraph.get_neighbors(u)
         neighbors_v = self.subgraph.get_neighbors(v)
+        if not neighbors_u or not neighbors_v:
+            return
 
-        # Find the shared neighbors between u and v
+        # Find the shared neighbors between u and v (the intersection iterates the smaller set, probing the larger one)
         shared_neighbors = neighbors_u & neighbors_v
+        if not shared_neighbors:
+            return
 
         # Get the incremental value according to the calculation of eta on t
         incr_value = self.calculate_eta(t)
+        shared_incr = incr_value * len(shared_neighbors)
+
+        # Update the global counter once for all the shared neighbors
+        self.global_counter += shared_incr
 
-        # Update the global/local counters for each shared neighbor
+        # If only the global count is needed, the local counters are not updated at all
+        if not self.track_local:
+            return
+
+        # Update local counters for each shared neighbor, and for u and v once for all the shared neighbors
+        local_counters = self.local_counters
         for neighbour in shared_neighbors:
-            # Update global counter
-            self.global_counter += incr_value
-            # Update local counters for shared neighbor, u, and v
-            self.local_counters[neighbour] += incr_value
-            self.local_counters[u]         += incr_value
-            self.local_counters[v]         += incr_value
+            local_counters[neighbour] += incr_value
+        local_counters[u] += shared_incr
+        local_counters[v] += shared_incr
 
 
     # Returns true or false depending whether it is possible to add the node or not to the graph
@@ -252,14 +492,14 @@ class TriestImpr:
             return True
 
         # If not, try to flip a coin, with unequal probability M/t of getting an head
-        elif random.random() < (self.M / t):
+        elif self.random.random() < (self.M / t):
 
             # Obtain a random edge from the set of edges
-            edge_list = self.subgraph.get_edges()
-            w, z = random.choice(edge_list)
+            w, z = self.subgraph.get_random_edge(self.random.random())
 
             # remove the sampled edge from subgraph
             self.subgraph.remove_edge(w, z)
+            self.edges_evicted += 1
             self.update_counters(t, w, z)
             return True
 
@@ -271,44 +511,152 @@ class TriestImpr:
         return max(1, (int(t) - 1)*(int(t) - 2) / (self.M*(self.M-1)))
 
 
-    # This is the main function of the class
-    # It implements the algorithm for Triest Improved
-    def algorithm(self, dataset_file):
+    # Process a single edge of the stream, updating the counters and the sample
+    def process_edge(self, u, v):
+        self.edges_read += 1
 
-        # Extract the edge stream from the dataset file and initialize t
-        edge_stream = extract_data(dataset_file)
-        t = 0
+        # Skip self-edges and keep the smaller node first, as done by extract_data
+        if u == v:
+            return
+        elif u > v:
+            u, v = v, u
 
-        # Iterate over each edge in the edge stream
-        for u, v in edge_stream:
-            # Make sure this edge is not present in our subgraph
-            if self.subgraph.has_edge(u, v):
-                continue
+        # Make sure this edge is not present in our subgraph
+        if self.subgraph.has_edge(u, v):
+            return
 
-            t += 1
-            self.update_counters(t, u, v)
+        self.t += 1
+        self.update_counters(self.t, u, v)
 
-            # If the edge can be added (t < M or t/M probability of getting head)
-            if self.sample_edge(t):
-                # Add the edge to the subgraph
-                self.subgraph.add_edge(u, v)
+        # If the edge can be added (t < M or t/M probability of getting head)
+        if self.sample_edge(self.t):
+            # Add the edge to the subgraph
+            self.subgraph.add_edge(u, v)
 
-        # Compute the estimate for the global/local triangle counts
-        global_triangles = int(self.global_counter)
 
-        # Print results
-        print(f'M: {self.M}, dataset_name: {dataset_file}')
-        print(f'Global triangles estimate: {global_triangles}')
+    # Return the current estimate of the global triangle count
+    def estimate(self):
+        return int(self.global_counter)
 
-        # If verbose mode is enabled, print local triangles estimate
-        if self.verbose:
-            # Create a new empty dictionary
-            local_triangles = {}
 
-            # Iterate over each node and its counter in local_counters
-            for u, counter in self.local_counters.items():
-                local_triangles[u] = int(counter)
-            
-            print(f'Local triangles estimate: {local_triangles}')
+    # Return the current estimate of the local triangle count of each node
+    def local_estimates(self):
+        return {u: int(counter) for u, counter in self.local_counter_items()}
+
+
+
+class TriestFD(TriestBase):
+    """
+    Implementation of the Triest Fully Dynamic Algorithm (insertions and deletions of edges)
+    Here t is the number of edges currently in the graph, and edges_read counts all the events read from the stream
+    """
+
+    # The stream is made of insertions and deletions of edges
+    extract_stream = staticmethod(extract_dynamic_data)
+    stream_name = 'Events'
+
+    # Initialize the instance of TriestFD as the one of TriestBase, with no uncompensated deletions
+    def __init__(self, M, verbose=False, top_k=None, track_local=True, seed=None):
+        super().__init__(M, verbose, top_k, track_local, seed)
+        # Deletions not yet compensated by an insertion, of edges that were (d_i) or were not (d_o) in the sample
+        self.d_i = 0
+        self.d_o = 0
+
+
+    # Returns true or false depending whether it is possible to add the node or not to the graph
+    # Deletions are compensated by the following insertions, as in random pairing
+    def sample_edge(self, t):
+        # If there are no uncompensated deletions, behave as a reservoir sampling
+        if self.d_i + self.d_o == 0:
+            # If the sample is not full, insert the edge (base case)
+            if len(self.subgraph.edges) < self.M:
+                return True
+
+            # If not, try to flip a coin, with unequal probability M/t of getting an head
+            elif self.random.random() < (self.M / t):
+
+                # Obtain a random edge from the set of edges
+                w, z = self.subgraph.get_random_edge(self.random.random())
+
+                # Remove the sampled edge from subgraph
+                self.subgraph.remove_edge(w, z)
+                self.edges_evicted += 1
+                self.update_counters('-', w, z)
+                return True
+
+            return False
+
+        # Otherwise, the edge compensates a deletion of an edge inside the sample with probability d_i/(d_i + d_o)
+        elif self.random.random() < (self.d_i / (self.d_i + self.d_o)):
+            self.d_i -= 1
+            return True
+
+        self.d_o -= 1
+        return False
+
+
+    # Calculate the probability kappa that at least three edges are in the sample, given the current deletions
+    def calculate_kappa(self, t):
+        s, d = t, self.d_i + self.d_o
+
+        # Without uncompensated deletions the sample is a plain reservoir sample
+        if d == 0:
+            return 1
+
+        # The binomial coefficients are computed with logarithms, since they overflow for large streams
+        omega = min(self.M, s + d)
+        log_comb = lambda n, k: math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+        kappa = 1
+        for j in range(3):
+            # C(d, omega - j) is zero if there are not enough deletions to fill the sample
+            if 0 <= omega - j <= d and j <= s:
+                kappa -= math.exp(log_comb(s, j) + log_comb(d, omega - j) - log_comb(s + d, omega))
+        return kappa
 
-        return global_triangles
\ No newline at end of file
+
+    # Calculate the factor used to scale the counters into estimates, given the current number of edges t
+    def calculate_eta(self, t):
+        sample_size = len(self.subgraph.edges)
+
+        # If there are less than three edges in the sample, no triangle can be observed
+        if sample_size < 3:
+            return 0
+
+        s = t
+        kappa = self.calculate_kappa(t)
+        return (s * (s - 1) * (s - 2)) / (sample_size * (sample_size - 1) * (sample_size - 2)) / kappa
+
+
+    # Process a single event of the stream, an insertion ('+') or a deletion ('-') of an edge
+    def process_edge(self, u, v, operation='+'):
+        self.edges_read += 1
+
+        # Skip self-edges and keep the smaller node first, as done by extract_dynamic_data
+        if u == v:
+            return
+        elif u > v:
+            u, v = v, u
+
+        if operation == '+':
+            # Make sure this edge is not present in our subgraph
+            if self.subgraph.has_edge(u, v):
+                return
+
+            self.t += 1
+
+            # If the edge can be added, add it to the subgraph and update the counters
+            if self.sample_edge(self.t):
+                self.subgraph.add_edge(u, v)
+                self.update_counters('+', u, v)
+
+        else:
+            self.t -= 1
+
+            # If the deleted edge is in the sample, remove it and update the counters
+            if self.subgraph.has_edge(u, v):
+                self.update_counters('-', u, v)
+                self.subgraph.remove_edge(u, v)
+                self.d_i += 1
+            else:
+                self.d_o += 1
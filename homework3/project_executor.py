@@ -1,6 +1,12 @@
+import os
+import sys
 import time
 import argparse
-from homework_classes import TriestBase, TriestImpr
+from homework_classes import TriestBase, TriestImpr, TriestFD
+
+# The instrumentation layer is shared by all the homeworks, in the root of the repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import Profiler
 
 # Create a parser object to handle command-line arguments
 parser = argparse.ArgumentParser(description="Find triangles' (global or local) estimates in a graph using TRIEST.")
@@ -8,26 +14,62 @@ parser = argparse.ArgumentParser(description="Find triangles' (global or local)
 
 # Add command-line arguments to the parser
 parser.add_argument('-dataset-file', default='web-Stanford.txt.gz', help='path to the dataset')
-parser.add_argument('-triest', default='impr', choices=['base', 'impr'], type=str, help='TRIEST algorithm')
+parser.add_argument('-triest', default='impr', choices=['base', 'impr', 'fd'], type=str, help='TRIEST algorithm (fd reads "+ u v"/"- u v" events)')
 parser.add_argument('-M', default=10000, type=int, help='resorvoir sampling size')
 parser.add_argument('-verbose', default=False, action='store_true', help='set true to print the results')
+parser.add_argument('-top-k', default=None, type=int, help='keep only the local estimates of the top-k nodes')
+parser.add_argument('-global-only', default=False, action='store_true', help='do not update the local counters')
+parser.add_argument('-snapshot-every', default=None, type=int, help='print the global estimate every N edges of the stream')
+parser.add_argument('-checkpoint-file', default=None, help='file where the state is saved at every snapshot')
+parser.add_argument('-seed', default=None, type=int, help='seed of the random stream, for reproducible estimates')
+parser.add_argument('-resume', default=False, action='store_true', help='restore the state from the checkpoint file before starting')
+parser.add_argument('-profile', '--profile', default=None, help='JSON file where stage timers and counters are written')
+parser.add_argument('-profile-cprofile', '--profile-cprofile', default=False, action='store_true', help='add a cProfile capture to the profile')
+parser.add_argument('-profile-memory', '--profile-memory', default=False, action='store_true', help='add a tracemalloc capture to the profile')
 
 # Parse the command-line arguments and print them
 args = parser.parse_args()
 print(args)
 
+# The checkpoint is only written at the snapshots, and it is needed to resume a previous run
+if args.resume and args.checkpoint_file is None:
+    parser.error('-resume requires -checkpoint-file')
+if args.checkpoint_file is not None and not args.snapshot_every:
+    parser.error('-checkpoint-file requires -snapshot-every')
+
+# If a profile file is given, the stages are timed and the counters are written in it as JSON
+profiler = Profiler(args.profile is not None, args.profile_cprofile, args.profile_memory)
+profiler.start()
+
 # Depending on the mode selected by the user, instanciate a different Triest class
 if args.triest == 'base':
-    # Call Triest Base passing sampling size M and verbose flag
-    triest = TriestBase(args.M, args.verbose)
+    # Call Triest Base passing sampling size M, verbose flag and top-k size
+    triest = TriestBase(args.M, args.verbose, args.top_k, not args.global_only, args.seed)
+elif args.triest == 'fd':
+    # Call Triest Fully Dynamic passing sampling size M, verbose flag and top-k size
+    triest = TriestFD(args.M, args.verbose, args.top_k, not args.global_only, args.seed)
 else:
-    # Call Triest Improved passing sampling size M and verbose flag
-    triest = TriestImpr(args.M, args.verbose)
+    # Call Triest Improved passing sampling size M, verbose flag and top-k size
+    triest = TriestImpr(args.M, args.verbose, args.top_k, not args.global_only, args.seed)
+
+# If requested, restore the sample and the counters from a previous run, so the stream is not replayed
+if args.resume:
+    with profiler.stage('load_checkpoint'):
+        triest.load_checkpoint(args.checkpoint_file)
 
 # Save the starting time and call the algorithm associated to the wanted algorithm (Base or Improved)
 start_time = time.time()
-global_triangles = triest.algorithm(args.dataset_file)
+with profiler.stage('algorithm'):
+    global_triangles = triest.algorithm(args.dataset_file, args.snapshot_every, args.checkpoint_file)
+profiler.count('edges_read', triest.edges_read)
+profiler.count('edges_considered', triest.t)
+profiler.count('edges_evicted', triest.edges_evicted)
+profiler.count('sample_size', len(triest.subgraph.edges))
+profiler.count('local_counters', len(triest.local_counters))
 
 # Print the time requested by the algorithm
 elapsed_time = time.time() - start_time
-print(f'TRIEST-{args.triest.upper()} took {elapsed_time:.3f}s')
\ No newline at end of file
+print(f'TRIEST-{args.triest.upper()} took {elapsed_time:.3f}s')
+
+# Write the profile, if requested
+profiler.save(args.profile)
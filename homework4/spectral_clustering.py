@@ -0,0 +1,225 @@
+import numpy as np
+from os.path import join
+from scipy import sparse
+from scipy.sparse import linalg
+from scipy.cluster.vq import kmeans2
+from scipy.sparse.csgraph import connected_components
+
+
+# Read the edge list of a dataset, where each line is "u,v" or "u,v,weight" (the weight is ignored, as in script.m)
+def read_edges(dataset_file):
+    dataset_path = join('datasets', dataset_file)
+    E = np.loadtxt(dataset_path, delimiter=',', ndmin=2, dtype=np.int64)
+    return E[:, 0], E[:, 1]
+
+
+# Generate the edge list of a random graph with n_clusters planted clusters, where each node has about degree edges
+# and a fraction out_fraction of the edges joins random nodes (of any cluster), with node ids starting from 1
+# Returns the edge list, as read_edges does, and the cluster of each node
+def get_planted_partition(n_nodes, n_clusters, degree, out_fraction, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, n_clusters, n_nodes)
+    n_edges = n_nodes * degree // 2
+    n_out = int(n_edges * out_fraction)
+
+    # The edges inside the clusters join a random node to a random node of its cluster
+    members = np.argsort(labels, kind='stable')
+    sizes = np.bincount(labels, minlength=n_clusters)
+    starts = np.cumsum(sizes) - sizes
+    col1 = rng.integers(0, n_nodes, n_edges)
+    col2 = rng.integers(0, n_nodes, n_edges)
+    inside = col1[n_out:]
+    col2[n_out:] = members[starts[labels[inside]] + rng.integers(0, sizes[labels[inside]])]
+
+    # Remove the self-edges
+    keep = col1 != col2
+    return col1[keep] + 1, col2[keep] + 1, labels
+
+
+# Creates a sparse adjacency matrix starting from the given edge list, with node ids starting from 1
+def get_adj_matrix(col1, col2):
+    # Calculate how big will the matrix be
+    max_ids = int(max(col1.max(), col2.max()))
+
+    # Create the sparse adjacency matrix from the edges list provided, as an undirected and unweighted graph
+    As = sparse.csr_matrix((np.ones(len(col1)), (col1 - 1, col2 - 1)), shape=(max_ids, max_ids))
+    A = As.maximum(As.T)
+    A.data[:] = 1
+    return A
+
+
+# Create the normalized Laplacian Matrix L = I - D^(-1/2)*A*D^(-1/2)
+def get_norm_laplacian(A):
+    # The elements of D are the sum of each respective row of A. Isolated nodes are left with a zero row.
+    degrees = np.asarray(A.sum(axis=1)).ravel()
+    d_inv_sqrt = np.zeros_like(degrees)
+    d_inv_sqrt[degrees > 0] = degrees[degrees > 0] ** (-1/2)
+    D_inv_sqrt = sparse.diags(d_inv_sqrt)
+
+    # Calculate the normalized Laplacian Matrix L from A and D, without ever creating a dense matrix
+    return (sparse.identity(A.shape[0], format='csr') - D_inv_sqrt @ A @ D_inv_sqrt).tocsr()
+
+
+# Get an orthonormal basis of the null space of the normalized Laplacian, as a sparse matrix with a column per component
+# Each connected component C (except isolated nodes) contributes the vector D^(1/2)*1_C, so no eigensolver is needed
+def get_null_space(A):
+    degrees = np.asarray(A.sum(axis=1)).ravel()
+    n_components, labels = connected_components(A, directed=False)
+
+    # Normalize the vectors of each component, skipping the isolated nodes (whose eigenvalue is 1, not 0)
+    norms = np.sqrt(np.bincount(labels, weights=degrees, minlength=n_components))
+    has_edges = norms > 0
+    component_ids = np.cumsum(has_edges) - 1
+    keep = has_edges[labels]
+    Z = sparse.csr_matrix((np.sqrt(degrees[keep]) / norms[labels[keep]], (np.flatnonzero(keep), component_ids[labels[keep]])),
+                          shape=(A.shape[0], int(has_edges.sum())))
+
+    # Sort the components from the largest to the smallest one
+    order = np.argsort(-np.diff(Z.tocsc().indptr), kind='stable')
+    return Z[:, order]
+
+
+# Get the n_pairs smallest eigenpairs of the normalized Laplacian L (whose spectrum lies in [0, 2]), orthogonal to the
+# already known eigenvectors. Those are given as a list of blocks of orthonormal columns (sparse or dense) and moved to
+# the top of the spectrum, with the deflated operator L' = P*L*P + 2*(I - P), where I - P projects on the known ones
+# The tolerance defaults to the machine precision for Lanczos and to 1e-8 for LOBPCG
+def get_next_eigenpairs(L, known, n_pairs, solver='lanczos', seed=0, tol=None):
+    n = L.shape[0]
+    rng = np.random.default_rng(seed)
+
+    # Project X on the space spanned by the known eigenvectors
+    def project_known(X):
+        X_known = np.zeros(X.shape)
+        for B in known:
+            X_known += B @ (B.T @ X)
+        return X_known
+
+    def deflated_matvec(X):
+        X_known = project_known(X)
+        L_rest = L @ (X - X_known)
+        return L_rest - project_known(L_rest) + 2 * X_known
+
+    if solver == 'lanczos':
+        # The smallest eigenpairs are computed as the largest of 2I - L', since Lanczos converges much faster on them
+        shifted = linalg.LinearOperator((n, n), matvec=lambda x: 2 * x - deflated_matvec(x),
+                                        matmat=lambda X: 2 * X - deflated_matvec(X), dtype=np.float64)
+        eigenvalues, V = linalg.eigsh(shifted, n_pairs, which='LA', v0=rng.standard_normal(n), tol=tol or 0)
+        eigenvalues = 2 - eigenvalues
+    elif solver == 'lobpcg':
+        deflated = linalg.LinearOperator((n, n), matvec=deflated_matvec, matmat=deflated_matvec, dtype=np.float64)
+        eigenvalues, V = linalg.lobpcg(deflated, rng.standard_normal((n, n_pairs)), largest=False, tol=tol or 1e-8, maxiter=1000)
+    else:
+        raise ValueError(f'Unknown eigensolver {solver}, choose between lanczos and lobpcg')
+
+    # Return the eigenpairs sorted by increasing eigenvalue
+    order = np.argsort(eigenvalues)
+    return eigenvalues[order], V[:, order]
+
+
+# Get the k smallest eigenpairs of the normalized Laplacian L of A
+# The null space is known from the connected components, so the solver only looks for the remaining eigenpairs:
+# eigensolvers tend to miss repeated eigenvalues otherwise
+def get_smallest_eigenpairs(A, L, k, solver='lanczos', seed=0):
+    # If there are at least k connected components, the null space of the k largest ones is the solution
+    Z = get_null_space(A)
+    n_null = min(k, Z.shape[1])
+    if n_null == k:
+        return np.zeros(k), Z[:, :k].toarray()
+
+    # Otherwise, compute the remaining eigenpairs and add them after the null space
+    eigenvalues, V = get_next_eigenpairs(L, [Z], k - n_null, solver, seed)
+    return np.concatenate((np.zeros(n_null), eigenvalues)), np.hstack((Z[:, :n_null].toarray(), V))
+
+
+# Select the number of clusters k with the eigengap heuristic, computing the smallest eigenpairs in batches
+# It stops as soon as the largest gap (between the k-th and the (k+1)-th eigenvalues) is at least gap_ratio times all
+# the gaps seen in the following batch_size eigenvalues, so the full spectrum is never computed
+# The gap after the null space is measured from exactly zero, so it also stands out when the following eigenvalues are
+# a group of small ones (as the ones of weakly connected clusters) ending with a larger gap: it is accepted only when
+# the computed eigenvalues go past the group, i.e. they span at least the gap itself after it
+# Returns k together with its eigenpairs, which can be reused for the clustering
+# The eigenpairs are computed with a relaxed tolerance, as the eigenvalues are dense after the gap and slow to converge
+def select_k(A, L, max_k=50, batch_size=5, gap_ratio=2, solver='lanczos', seed=0, tol=1e-6):
+    max_k = min(max_k, L.shape[0] - 1)
+
+    # The null space comes for free from the connected components
+    Z = get_null_space(A)
+    if Z.shape[1] >= max_k:
+        return max_k, np.zeros(max_k), Z[:, :max_k].toarray()
+    n_null = Z.shape[1]
+    eigenvalues, known = np.zeros(n_null), [Z]
+    n_pairs = batch_size
+
+    while True:
+        # Compute the next batch of eigenpairs, orthogonal to the ones already known
+        n_pairs = min(n_pairs, batch_size, max_k + 1 - len(eigenvalues))
+        next_eigenvalues, V = get_next_eigenpairs(L, known, n_pairs, solver, seed, tol)
+        eigenvalues = np.concatenate((eigenvalues, next_eigenvalues))
+        known.append(V)
+
+        # Find the largest gap, where gaps[k - 1] is the gap between the k-th and the (k+1)-th eigenvalues
+        gaps = np.diff(eigenvalues)
+        k = int(np.argmax(gaps[:max_k])) + 1
+
+        # Stop if the gap is clear, or if max_k + 1 eigenvalues (max_k gaps) have been computed
+        next_gaps = gaps[k:k + batch_size]
+        clear_gap = len(next_gaps) == batch_size and gaps[k - 1] >= gap_ratio * next_gaps.max()
+        if k == n_null and eigenvalues[-1] < eigenvalues[k] + gaps[k - 1]:
+            clear_gap = False
+        if clear_gap or len(eigenvalues) > max_k:
+            break
+
+        # Otherwise, compute only the eigenpairs still needed to check the gap of the current k, or a new batch
+        # if they have already been computed (and the gap was not clear)
+        n_pairs = k + batch_size + 1 - len(eigenvalues)
+        if n_pairs <= 0:
+            n_pairs = batch_size
+
+    # Collect the eigenvectors of the k smallest eigenvalues
+    V = np.hstack([B.toarray() if sparse.issparse(B) else B for B in known])
+    return k, eigenvalues[:k], V[:, :k]
+
+
+# Perform spectral clustering, assigning each node to one of the k clusters
+# If k is not given, it is selected with the eigengap heuristic
+def perform_clustering(A, k=None, solver='lanczos', seed=0):
+    # Get normalized laplacian from A
+    L = get_norm_laplacian(A)
+
+    # Get the k smallest eigenvectors of L and then normalize each row to unit length
+    if k is None:
+        k, _, V = select_k(A, L, solver=solver, seed=seed)
+    else:
+        _, V = get_smallest_eigenpairs(A, L, k, solver, seed)
+    norms = np.linalg.norm(V, axis=1, keepdims=True)
+    Y = V / np.where(norms > 0, norms, 1)
+
+    # Perform K-means clustering on them
+    _, clusters = kmeans2(Y, k, minit='++', seed=seed)
+    return L, clusters
+
+
+# Read a dataset and cluster its nodes in k clusters (selected automatically if not given)
+def algorithm(dataset_file, k=None, solver='lanczos', seed=0):
+    # Create the sparse adjacency matrix
+    A = get_adj_matrix(*read_edges(dataset_file))
+
+    # Perform the clustering and print the size of each cluster
+    L, clusters = perform_clustering(A, k, solver, seed)
+    print(f'{dataset_file}: {A.shape[0]} nodes, {A.nnz // 2} edges')
+    print(f'Cluster sizes: {np.bincount(clusters).tolist()}')
+
+    return clusters, L
+
+
+# When this file is directly executed, call the algorithm on both the datasets, selecting k with the eigengap
+# Then check the selection of k on a connected graph with 9 weakly connected planted clusters, whose 8 smallest non-zero
+# eigenvalues are close to each other and far below the following ones
+if __name__ == '__main__':
+    algorithm('example1.dat')
+    algorithm('example2.dat')
+
+    col1, col2, labels = get_planted_partition(20000, 9, 14, 0.025)
+    _, clusters = perform_clustering(get_adj_matrix(col1, col2))
+    print(f'Planted partition: {clusters.max() + 1} clusters found, {np.bincount(labels).tolist()} planted')
+    assert clusters.max() + 1 == 9
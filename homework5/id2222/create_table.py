@@ -2,6 +2,7 @@ import argparse
 import itertools
 import pandas as pd
 from pathlib import Path
+from results_index import index_results
 
 parser = argparse.ArgumentParser(description='Create tables from a list of output CSV files.')
 parser.add_argument('--graphs', nargs='+', help='list of graphs to analyse')
@@ -12,23 +13,21 @@ parser.add_argument('--delta-decay', nargs='+', default=[0.0], help='decay rate
 parser.add_argument('--restart-temp', action='store_true', default=False, help='restart temperature')
 
 args = parser.parse_args()
-restart_temp = str(args.restart_temp).lower()
 print(args)
 
-output_dir = Path('output')
+# scan the output directory once, indexing the parameters and the best solution of each run
+index, _ = index_results(Path('output'))
 results = []
 
 for graph, annealing_policy, node_policy, delta, delta_decay in itertools.product(args.graphs, args.annealing_policy,
                                                                           args.node_policy, args.delta, args.delta_decay):
-    # find and read the CSV file from the output directory
-    csv_file = next(output_dir.glob(f'{graph}.graph_AP_{annealing_policy}_NS_{node_policy}'
-                                    f'*_D_{delta}*_RT_{restart_temp}_DD_{delta_decay}*.txt'), None)
-    if csv_file is None: continue
-    output_df = pd.read_csv(csv_file, engine='python', comment='#', sep='\t\t')
-
-    # take the last solution with the best edge cut
-    edge_cut = output_df['Edge-Cut']
-    best_solution = output_df[edge_cut == edge_cut.min()].iloc[-1]
+    # find the run with these parameters in the index
+    if index.empty: continue
+    run = index[(index['graph'] == graph) & (index['annealing_policy'] == annealing_policy) &
+                (index['node_policy'] == node_policy) & (index['delta'] == float(delta)) &
+                (index['restart_temp'] == args.restart_temp) & (index['delta_decay'] == float(delta_decay))]
+    if run.empty: continue
+    best_solution = run.iloc[0]
 
     results.append({
         'Graph': graph,
@@ -36,7 +35,7 @@ for graph, annealing_policy, node_policy, delta, delta_decay in itertools.produc
         'Node Policy': node_policy,
         'Delta': delta,
         'Delta Decay': delta_decay,
-        'Edge-cut': int(best_solution['Edge-Cut']),
+        'Edge-cut': int(best_solution['Edge-cut']),
         'Swaps': int(best_solution['Swaps']),
         'Migrations': int(best_solution['Migrations'])
     })
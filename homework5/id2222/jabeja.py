@@ -0,0 +1,264 @@
+import os
+import argparse
+import itertools
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from metis_graph import load_graph, initial_colors
+
+
+class Jabeja:
+    """
+    Python version of the JaBeJa local search, operating on the CSR arrays of a graph.
+    Instead of visiting one node at a time, it evaluates the candidate swaps of a batch of nodes at once with NumPy,
+    keeping for each node the number of its neighbours of each colour (colour-degree matrix).
+    """
+
+    # Initialize the instance of Jabeja with the same parameters (and defaults) of the Java CLI
+    def __init__(self, indptr, indices, n_partitions=4, rounds=1000, temperature=2.0, delta=0.003, alpha=2.0,
+                 annealing_policy='LINEAR', node_policy='HYBRID', rnss=3, urss=6, restart_temp=False,
+                 rounds_restart=100, delta_decay=0.0, init_color_policy='ROUND_ROBIN', seed=0, batch_size=256):
+        self.indptr, self.indices = indptr, indices
+        self.n_nodes = len(indptr) - 1
+        self.n_partitions = n_partitions
+        self.rounds = rounds
+        self.delta = delta
+        self.alpha = alpha
+        self.annealing_policy = annealing_policy
+        self.node_policy = node_policy
+        self.rnss, self.urss = rnss, urss
+        self.restart_temp, self.rounds_restart, self.delta_decay = restart_temp, rounds_restart, delta_decay
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+
+        # As in the Java version, the temperature is restarted to 1 for the exponential policies
+        self.linear_annealing = annealing_policy == 'LINEAR'
+        self.T = temperature
+        self.restart_T = temperature if self.linear_annealing else 1.0
+
+        # Initial colours and colour-degree matrix
+        self.init_colors = initial_colors(self.n_nodes, n_partitions, init_color_policy, seed)
+        self.colors = self.init_colors.copy()
+        self.degrees = np.diff(indptr)
+        self.rows = np.repeat(np.arange(self.n_nodes), self.degrees)
+        self.color_degrees = np.zeros((self.n_nodes, n_partitions), dtype=np.int64)
+        np.add.at(self.color_degrees, (self.rows, self.colors[indices]), 1)
+
+        self.number_of_swaps = 0
+        self.same_edge_cut_rounds = 0
+        self.previous_edge_cut = None
+
+
+    # Run the algorithm, returning an array with a row per round (Round, Edge-Cut, Swaps, Migrations)
+    def run(self):
+        results = np.zeros((self.rounds, 4), dtype=np.int64)
+
+        for round_number in range(self.rounds):
+            # Visit all the nodes in a random order, one batch at a time
+            for batch in np.array_split(self.rng.permutation(self.n_nodes), max(1, self.n_nodes // self.batch_size)):
+                self.sample_and_swap(batch)
+
+            # One cycle for all nodes have completed, reduce the temperature
+            self.sa_cool_down()
+            results[round_number] = self.report(round_number)
+            self.restart_temperature(results[round_number, 1])
+
+        return results
+
+
+    # Simulated annealing cooling function
+    def sa_cool_down(self):
+        min_temp = 1.0 if self.linear_annealing else 0.0001
+
+        if self.T > min_temp and self.linear_annealing:
+            # Decrease temperature linearly over time
+            self.T -= self.delta
+        elif self.T > min_temp:
+            # Decrease temperature exponentially over time
+            self.T *= self.delta
+        else:
+            self.T = min_temp
+
+
+    # Restart temperature if the edge cut has not changed for rounds_restart rounds (it may be a local minimum)
+    def restart_temperature(self, edge_cut):
+        if not self.restart_temp:
+            return
+
+        if edge_cut == self.previous_edge_cut:
+            self.same_edge_cut_rounds += 1
+
+            if self.same_edge_cut_rounds == self.rounds_restart:
+                self.T = self.restart_T
+                # Decaying delta over time may converge to better solutions
+                self.delta /= 1 + self.delta_decay
+                self.same_edge_cut_rounds = 0
+        else:
+            self.same_edge_cut_rounds = 0
+
+        self.previous_edge_cut = edge_cut
+
+
+    # Sample a candidate partner for each node, drawing from its neighbours or from the entire graph
+    # Returns a (batch, count) matrix of candidates, where -1 marks a missing candidate
+    def get_candidates(self, batch, count, local):
+        if local:
+            # Nodes without neighbours have no local candidates
+            degrees = self.degrees[batch][:, None]
+            offsets = (self.rng.random((len(batch), count)) * degrees).astype(np.int64)
+            candidates = self.indices[np.minimum(self.indptr[batch][:, None] + offsets, len(self.indices) - 1)]
+            return np.where(degrees > 0, candidates, -1)
+
+        candidates = self.rng.integers(0, self.n_nodes, (len(batch), count))
+        return np.where(candidates != batch[:, None], candidates, -1)
+
+
+    # Find the best partner for each node of the batch among its candidates, -1 if there is none
+    def find_partners(self, batch, candidates):
+        valid = candidates >= 0
+        q = np.where(valid, candidates, 0)
+        p = np.broadcast_to(batch[:, None], q.shape)
+        color_p, color_q = self.colors[p], self.colors[q]
+
+        # Compute dpp, dqq, dpq and dqp for every candidate swap at once
+        dpp = self.color_degrees[p, color_p]
+        dqq = self.color_degrees[q, color_q]
+        dpq = self.color_degrees[p, color_q]
+        dqp = self.color_degrees[q, color_p]
+        old_value = dpp ** self.alpha + dqq ** self.alpha
+        new_value = dpq ** self.alpha + dqp ** self.alpha
+
+        if self.linear_annealing:
+            benefit = new_value
+            update = new_value * self.T > old_value
+        else:
+            with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+                if self.annealing_policy == 'EXPONENTIAL':
+                    # Acceptance probability: a_p = e^((new - old) / T)
+                    benefit = np.exp((new_value - old_value) / self.T)
+                else:
+                    # Acceptance probability: a_p = e^((1/old - 1/new) / T)
+                    benefit = np.exp((1 / old_value - 1 / new_value) / self.T)
+            update = (benefit > self.rng.random(benefit.shape)) & (new_value != old_value)
+
+        # Keep the candidate with the highest benefit, among the ones accepted
+        benefit = np.where(update & valid, benefit, 0)
+        best = np.argmax(benefit, axis=1)
+        best_benefit = benefit[np.arange(len(batch)), best]
+        return np.where(best_benefit > 0, q[np.arange(len(batch)), best], -1), best_benefit
+
+
+    # Sample and swap for a batch of nodes, following the node selection policy
+    def sample_and_swap(self, batch):
+        partners = np.full(len(batch), -1)
+        benefits = np.zeros(len(batch))
+
+        if self.node_policy in ('HYBRID', 'LOCAL'):
+            # Swap with random neighbors
+            partners, benefits = self.find_partners(batch, self.get_candidates(batch, self.rnss, True))
+
+        if self.node_policy in ('HYBRID', 'RANDOM'):
+            # If local policy fails then randomly sample the entire graph
+            missing = partners < 0
+            if missing.any():
+                random_candidates = self.get_candidates(batch[missing], self.urss, False)
+                partners[missing], benefits[missing] = self.find_partners(batch[missing], random_candidates)
+
+        found = partners >= 0
+        self.swap_colors(batch[found], partners[found], benefits[found])
+
+
+    # Swap the colours of the pairs (p, q), updating the colour-degree matrix of their neighbours
+    # A node can take part in a single swap per batch, so the swaps are applied by decreasing benefit
+    def swap_colors(self, p, q, benefits):
+        order = np.argsort(-benefits, kind='stable')
+        p, q = p[order], q[order]
+
+        # Keep a swap only if it is the first one (with the highest benefit) of both its nodes
+        # The endpoints are interleaved as p0, q0, p1, q1, ..., so the first occurrence of a node is in its best swap
+        endpoints = np.stack((p, q), axis=1).ravel()
+        swap_ids = np.repeat(np.arange(len(p)), 2)
+        _, first = np.unique(endpoints, return_index=True)
+        first_swap = np.full(len(p), True)
+        is_first = np.zeros(len(endpoints), dtype=bool)
+        is_first[first] = True
+        np.logical_and.at(first_swap, swap_ids, is_first)
+        p, q = p[first_swap], q[first_swap]
+        if len(p) == 0:
+            return
+
+        # Swap the colours
+        moved = np.concatenate((p, q))
+        old_colors = self.colors[moved]
+        new_colors = np.concatenate((self.colors[q], self.colors[p]))
+        self.colors[moved] = new_colors
+        self.number_of_swaps += len(p)
+
+        # Update the colour-degree matrix of the neighbours of the moved nodes
+        counts = self.degrees[moved]
+        neighbour_ids = np.repeat(self.indptr[moved] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        neighbours = self.indices[neighbour_ids]
+        np.add.at(self.color_degrees, (neighbours, np.repeat(old_colors, counts)), -1)
+        np.add.at(self.color_degrees, (neighbours, np.repeat(new_colors, counts)), 1)
+
+
+    # Compute the edge cut, the number of swaps and the number of migrations of the current round
+    def report(self, round_number):
+        gray_links = self.degrees.sum() - self.color_degrees[np.arange(self.n_nodes), self.colors].sum()
+        migrations = np.count_nonzero(self.colors != self.init_colors)
+        return round_number, gray_links // 2, self.number_of_swaps, migrations
+
+
+# Get the name of the output file of a run, with the same format of Jabeja.saveToFile
+# As the Java constructor sets the temperature of the configuration to 1 for the exponential policies, so does the name
+def get_output_filename(graph_file, config):
+    temperature = config.get('temperature', 2.0) if config['annealing_policy'] == 'LINEAR' else 1.0
+    return (f'{Path(graph_file).name}_AP_{config["annealing_policy"]}_NS_{config["node_policy"]}'
+            f'_GICP_{config.get("init_color_policy", "ROUND_ROBIN")}_T_{float(temperature)}'
+            f'_D_{float(config["delta"])}_RNSS_{config.get("rnss", 3)}_URSS_{config.get("urss", 6)}'
+            f'_RT_{str(config["restart_temp"]).lower()}_DD_{float(config["delta_decay"])}'
+            f'_A_{float(config.get("alpha", 2.0))}_R_{config.get("rounds", 1000)}.txt')
+
+
+# Run a configuration on a graph and save its results in the output directory, in the same format of the Java version
+def run_configuration(graph_file, config, output_dir='output'):
+    indptr, indices = load_graph(graph_file)
+    results = Jabeja(indptr, indices, **config).run()
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = Path(output_dir) / get_output_filename(graph_file, config)
+    header = '# Migration is number of nodes that have changed color.\n\nRound\t\tEdge-Cut\t\tSwaps\t\tMigrations\t\tSkipped'
+    np.savetxt(output_file, results, fmt='%d', delimiter='\t\t', header=header, comments='')
+    return output_file, results
+
+
+# Run all the configurations of a sweep on all the graphs, in parallel on different processes
+def run_sweep(graph_files, configs, output_dir='output', workers=None):
+    tasks = list(itertools.product(graph_files, configs))
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(run_configuration, graph_file, config, output_dir) for graph_file, config in tasks]
+        return [future.result() for future in futures]
+
+
+# When this file is directly executed, run a sweep of the parameters, as run_tasks.sh does with the Java version
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep the JaBeJa parameters on a list of graphs.')
+    parser.add_argument('--graphs', nargs='+', required=True, help='list of graphs to partition')
+    parser.add_argument('--annealing-policy', nargs='+', default=['LINEAR'], help='annealing selection policy')
+    parser.add_argument('--node-policy', nargs='+', default=['HYBRID'], help='node selection policy')
+    parser.add_argument('--delta', nargs='+', default=[0.003], type=float, help='simulated annealing delta')
+    parser.add_argument('--delta-decay', nargs='+', default=[0.0], type=float, help='decay rate for delta parameter')
+    parser.add_argument('--restart-temp', action='store_true', default=False, help='restart temperature')
+    parser.add_argument('--rounds', default=1000, type=int, help='number of rounds')
+    parser.add_argument('--workers', default=None, type=int, help='number of parallel processes')
+    args = parser.parse_args()
+    print(args)
+
+    configs = [{'annealing_policy': annealing_policy, 'node_policy': node_policy, 'delta': delta,
+                'delta_decay': delta_decay, 'restart_temp': args.restart_temp, 'rounds': args.rounds}
+               for annealing_policy, node_policy, delta, delta_decay in itertools.product(args.annealing_policy,
+                                                            args.node_policy, args.delta, args.delta_decay)]
+    graph_files = [f'graphs/{graph}.graph' for graph in args.graphs]
+
+    for output_file, results in run_sweep(graph_files, configs, workers=args.workers):
+        print(f'{output_file}: best edge cut {results[:, 1].min()}')
@@ -0,0 +1,128 @@
+import os
+import argparse
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Read a graph in METIS format into CSR arrays (indptr, indices), with 0-based node ids
+# The i-th line after the header holds the (1-based) neighbours of node i, so all the tokens are parsed in a single
+# vectorized pass and each of them is assigned to its line by counting the newlines that precede it
+def read_metis_graph(graph_file):
+    data = Path(graph_file).read_bytes()
+
+    # Comment lines are removed before parsing, as GraphReader does
+    if b'%' in data or b'#' in data:
+        data = b'\n'.join(line for line in data.split(b'\n') if not line.startswith((b'%', b'#')))
+
+    # The header contains the number of nodes and edges, weighted graphs are not supported
+    header, _, body = data.partition(b'\n')
+    header = header.split()
+    n_nodes = int(header[0])
+    if len(header) > 2 and int(header[2]) != 0:
+        raise ValueError(f'{graph_file}: weighted METIS graphs are not supported')
+
+    # Find where each token starts, and the line (node) it belongs to
+    chars = np.frombuffer(body, dtype=np.uint8)
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+    token_starts = np.flatnonzero(is_digit & ~np.r_[False, is_digit[:-1]])
+    rows = np.searchsorted(np.flatnonzero(chars == ord('\n')), token_starts)
+
+    # Parse the tokens and build the CSR arrays
+    indices = np.array(body.split(), dtype=np.int64) - 1
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+
+    # The number of edges of the header is not checked, since some graphs (e.g. twitter) are not symmetric
+    return indptr, indices
+
+
+# Load a graph in METIS format, caching its CSR arrays in a .npz file next to it
+# The cache is invalidated whenever the graph file is modified
+def load_graph(graph_file, use_cache=True):
+    cache_file = str(graph_file) + '.npz'
+    graph_stat = os.stat(graph_file)
+    graph_key = np.array([graph_stat.st_size, graph_stat.st_mtime_ns], dtype=np.int64)
+
+    # If the cache is still valid, return the arrays stored in it
+    if use_cache and os.path.exists(cache_file):
+        with np.load(cache_file) as cache:
+            if np.array_equal(cache['graph_key'], graph_key):
+                return cache['indptr'], cache['indices']
+
+    # Otherwise, parse the graph and store it in the cache
+    indptr, indices = read_metis_graph(graph_file)
+    if use_cache:
+        np.savez(cache_file, graph_key=graph_key, indptr=indptr, indices=indices)
+    return indptr, indices
+
+
+# Load several graphs in parallel, returning a dictionary (graph file, (indptr, indices))
+def load_graphs(graph_files, workers=None, use_cache=True):
+    with ProcessPoolExecutor(workers) as executor:
+        graphs = executor.map(load_graph, graph_files, [use_cache] * len(graph_files))
+        return dict(zip(graph_files, graphs))
+
+
+# Read a partition vector, with the colour of each node on a different line (as the .part.4 files)
+def load_partition(partition_file):
+    return np.loadtxt(partition_file, dtype=np.int64, ndmin=1)
+
+
+# Generate the initial colours of the nodes according to the policy, as GraphReader does
+# RANDOM cannot reproduce the Java random generator, so it uses a NumPy one
+def initial_colors(n_nodes, n_partitions=4, policy='ROUND_ROBIN', seed=0):
+    ids = np.arange(1, n_nodes + 1)
+    if policy == 'ROUND_ROBIN':
+        return ids % n_partitions
+    elif policy == 'BATCH':
+        return np.ceil(ids / (n_nodes / n_partitions)).astype(np.int64) - 1
+    elif policy == 'RANDOM':
+        return np.random.default_rng(seed).integers(0, n_partitions, n_nodes)
+    raise ValueError(f'{policy} for initial color selection is not implemented')
+
+
+# Count the edges whose endpoints have different colours, each undirected edge is stored twice in the CSR arrays
+def edge_cut(indptr, indices, colors):
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    return int(np.count_nonzero(colors[rows] != colors[indices]) // 2)
+
+
+# Compute the ratio between the largest partition and the size of a perfectly balanced one
+def balance(colors, n_partitions=None):
+    sizes = np.bincount(colors, minlength=n_partitions or 0)
+    return float(sizes.max() / (len(colors) / len(sizes)))
+
+
+# Count the nodes that have changed their initial colour
+def migrations(colors, init_colors):
+    return int(np.count_nonzero(colors != init_colors))
+
+
+# Evaluate a partition of a graph, with the same metrics of the JaBeJa output files
+def evaluate_partition(indptr, indices, colors, init_colors=None):
+    if init_colors is None:
+        init_colors = initial_colors(len(colors), int(colors.max()) + 1)
+
+    return {
+        'Edge-Cut': edge_cut(indptr, indices, colors),
+        'Balance': balance(colors),
+        'Migrations': migrations(colors, init_colors)
+    }
+
+
+# When this file is directly executed, evaluate the given partition files on their graphs
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate edge-cut, balance and migrations of partitions of METIS graphs.')
+    parser.add_argument('--graph', required=True, help='graph in METIS format')
+    parser.add_argument('--partitions', nargs='+', required=True, help='list of partition files, a colour per line')
+    parser.add_argument('--init-color-policy', default='ROUND_ROBIN', help='initial color policy used for the migrations')
+    args = parser.parse_args()
+
+    indptr, indices = load_graph(args.graph)
+    print(f'{args.graph}: {len(indptr) - 1} nodes, {len(indices) // 2} edges')
+
+    for partition_file in args.partitions:
+        colors = load_partition(partition_file)
+        init_colors = initial_colors(len(colors), int(colors.max()) + 1, args.init_color_policy)
+        print(partition_file, evaluate_partition(indptr, indices, colors, init_colors))
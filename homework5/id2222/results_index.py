@@ -0,0 +1,109 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Output files are named by Jabeja.saveToFile after the graph and the configuration of the run
+FILENAME_PATTERN = re.compile(r'(?P<graph>.+)\.graph_AP_(?P<annealing_policy>\w+?)_NS_(?P<node_policy>\w+?)'
+                              r'_GICP_(?P<init_color_policy>\w+?)_T_(?P<temperature>[\d.]+)_D_(?P<delta>[\d.E-]+)'
+                              r'_RNSS_(?P<rnss>\d+)_URSS_(?P<urss>\d+)_RT_(?P<restart_temp>true|false)'
+                              r'_DD_(?P<delta_decay>[\d.E-]+)_A_(?P<alpha>[\d.]+)_R_(?P<rounds>\d+)\.txt')
+FLOAT_PARAMETERS = ['temperature', 'delta', 'delta_decay', 'alpha']
+INT_PARAMETERS = ['rnss', 'urss', 'rounds']
+COLUMNS = ['Round', 'Edge-Cut', 'Swaps', 'Migrations']
+CACHE_FILE = '.results_index.npz'
+
+
+# Parse the parameters of a run from the name of its output file, returns None if the name does not match
+def parse_filename(filename):
+    match = FILENAME_PATTERN.fullmatch(filename)
+    if match is None:
+        return None
+
+    parameters = match.groupdict()
+    for parameter in FLOAT_PARAMETERS:
+        parameters[parameter] = float(parameters[parameter])
+    for parameter in INT_PARAMETERS:
+        parameters[parameter] = int(parameters[parameter])
+    parameters['restart_temp'] = parameters['restart_temp'] == 'true'
+    return parameters
+
+
+# Read an output file into an array with a row per round and the columns Round, Edge-Cut, Swaps and Migrations
+# Only the numbers after the header are parsed, with a single split. Files created after a delta decay have no header.
+def read_results(results_file):
+    data = Path(results_file).read_bytes()
+    header_end = data.find(b'Round')
+    if header_end >= 0:
+        data = data[data.find(b'\n', header_end) + 1:]
+
+    values = np.array(data.split(), dtype=np.int64)
+    return values.reshape(-1, len(COLUMNS))
+
+
+# Load the cached results of the previous scans, as a dictionary (filename, (size, mtime, results))
+def load_cache(cache_file):
+    if not os.path.exists(cache_file):
+        return {}
+
+    # Every access to an array of the NpzFile reads it again from the archive, so the results are read only once
+    with np.load(cache_file) as cache:
+        offsets, results = cache['offsets'], cache['results']
+        return {filename: (size, mtime, results[offsets[i]:offsets[i + 1]])
+                for i, (filename, size, mtime) in enumerate(zip(cache['filenames'], cache['sizes'], cache['mtimes']))}
+
+
+# Store the results of all the scanned files in a single cache file, concatenating their arrays
+def save_cache(cache_file, cached):
+    filenames = list(cached)
+    results = [cached[filename][2] for filename in filenames]
+    offsets = np.cumsum([0] + [len(r) for r in results])
+
+    np.savez(cache_file, filenames=np.array(filenames, dtype=str),
+             sizes=np.array([cached[filename][0] for filename in filenames], dtype=np.int64),
+             mtimes=np.array([cached[filename][1] for filename in filenames], dtype=np.int64),
+             offsets=offsets,
+             results=np.concatenate(results) if results else np.empty((0, len(COLUMNS)), dtype=np.int64))
+
+
+# Scan the output directory once, returning a DataFrame with the parameters of each run and its best solution,
+# together with a dictionary (filename, results array). Only new or modified files are parsed, in parallel.
+def index_results(output_dir='output', workers=None, use_cache=True):
+    output_dir = Path(output_dir)
+    cache_file = output_dir / CACHE_FILE
+    cached = load_cache(cache_file) if use_cache else {}
+
+    # Find the output files, and the ones that have to be parsed again
+    files = {}
+    for entry in os.scandir(output_dir):
+        parameters = parse_filename(entry.name)
+        if parameters is not None:
+            stat = entry.stat()
+            files[entry.name] = (parameters, stat.st_size, stat.st_mtime_ns)
+    to_parse = [filename for filename, (_, size, mtime) in files.items()
+                if filename not in cached or cached[filename][:2] != (size, mtime)]
+
+    # Parse the new files in parallel and update the cache
+    with ThreadPoolExecutor(workers) as executor:
+        for filename, results in zip(to_parse, executor.map(read_results, [output_dir / f for f in to_parse])):
+            cached[filename] = (files[filename][1], files[filename][2], results)
+    cached = {filename: cached[filename] for filename in files}
+    if use_cache and to_parse:
+        save_cache(cache_file, cached)
+
+    # Create the index, taking the last solution with the best edge cut of each run
+    rows = []
+    for filename, (parameters, _, _) in files.items():
+        results = cached[filename][2]
+        if len(results) == 0:
+            continue
+        edge_cut = results[:, 1]
+        best_solution = results[len(edge_cut) - 1 - np.argmin(edge_cut[::-1])]
+        rows.append({'file': filename, **parameters, 'Edge-cut': int(best_solution[1]),
+                     'Swaps': int(best_solution[2]), 'Migrations': int(best_solution[3])})
+
+    index = pd.DataFrame(rows).sort_values('file', ignore_index=True) if rows else pd.DataFrame()
+    return index, {filename: cached[filename][2] for filename in files}
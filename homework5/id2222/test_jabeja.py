@@ -0,0 +1,27 @@
+import numpy as np
+from scipy import sparse
+from jabeja import Jabeja
+
+
+# Create a Jabeja instance on the path graph 0 - 1 - ... - (n_nodes - 1)
+def get_path_jabeja(n_nodes):
+    A = sparse.diags([np.ones(n_nodes - 1), np.ones(n_nodes - 1)], [-1, 1], format='csr')
+    return Jabeja(A.indptr, A.indices, n_partitions=4)
+
+
+# When two swaps share a node, only the one with the highest benefit is applied, even if the node is its second endpoint
+def test_swap_colors_keeps_highest_benefit_swap():
+    jabeja = get_path_jabeja(6)
+    colors = jabeja.colors.copy()
+
+    jabeja.swap_colors(np.array([5, 2]), np.array([2, 3]), np.array([10.0, 5.0]))
+
+    expected_colors = colors.copy()
+    expected_colors[[5, 2]] = colors[[2, 5]]
+    assert np.array_equal(jabeja.colors, expected_colors)
+    assert jabeja.number_of_swaps == 1
+
+    # The colour-degree matrix is updated as if it were computed again from the new colours
+    color_degrees = np.zeros_like(jabeja.color_degrees)
+    np.add.at(color_degrees, (jabeja.rows, jabeja.colors[jabeja.indices]), 1)
+    assert np.array_equal(jabeja.color_degrees, color_degrees)
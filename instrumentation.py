@@ -0,0 +1,96 @@
+import io
+import json
+import time
+import pstats
+import cProfile
+import contextlib
+import tracemalloc
+from collections import defaultdict
+
+
+class Profiler:
+    """
+    Lightweight instrumentation of the homework pipelines: stage timers, counters and, optionally, cProfile and
+    tracemalloc captures, written as JSON.
+    When it is disabled, stage() returns a shared no-op context manager and count() returns immediately, so it can be
+    left in the code at almost no cost. Counters are meant to be updated once per stage (e.g. with the size of a result),
+    not inside the hot loops.
+    """
+
+    NULL_STAGE = contextlib.nullcontext()
+
+    # Initialize the profiler, by default disabled
+    def __init__(self, enabled=False, use_cprofile=False, use_tracemalloc=False):
+        self.enabled = enabled
+        self.use_cprofile = enabled and use_cprofile
+        self.use_tracemalloc = enabled and use_tracemalloc
+        self.stages = defaultdict(lambda: {'calls': 0, 'time': 0.0})
+        self.counters = defaultdict(int)
+        self.cprofile = cProfile.Profile() if self.use_cprofile else None
+        self.start_time = None
+
+    # Start the optional captures, and the timer of the whole run
+    def start(self):
+        if not self.enabled:
+            return
+        self.start_time = time.perf_counter()
+        if self.use_tracemalloc:
+            tracemalloc.start()
+        if self.use_cprofile:
+            self.cprofile.enable()
+
+    # Stop the optional captures
+    def stop(self):
+        if self.use_cprofile:
+            self.cprofile.disable()
+
+    # Time a stage of the pipeline, used as "with profiler.stage(name):". The times of repeated stages are summed.
+    def stage(self, name):
+        if not self.enabled:
+            return self.NULL_STAGE
+        return self.timed_stage(name)
+
+    @contextlib.contextmanager
+    def timed_stage(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name]['calls'] += 1
+            self.stages[name]['time'] += time.perf_counter() - start_time
+
+    # Increment a counter by the given value
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] += value
+
+    # Collect the stages, the counters and the optional captures in a dictionary
+    def report(self, top=20):
+        self.stop()
+        report = {'total_time': time.perf_counter() - self.start_time if self.start_time is not None else None,
+                  'stages': dict(self.stages), 'counters': dict(self.counters)}
+
+        # The functions with the highest cumulative time
+        if self.use_cprofile:
+            stats = pstats.Stats(self.cprofile, stream=io.StringIO())
+            functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+            report['cprofile'] = [{'function': f'{file}:{line}({function})', 'calls': calls, 'total_time': total_time,
+                                   'cumulative_time': cumulative_time}
+                                  for (file, line, function), (_, calls, total_time, cumulative_time, _) in functions]
+
+        # The peak of the traced memory and the lines that allocated most of the current one
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines = tracemalloc.take_snapshot().statistics('lineno')[:top]
+            tracemalloc.stop()
+            report['tracemalloc'] = {'current': current, 'peak': peak,
+                                     'top_lines': [{'line': str(stat.traceback), 'size': stat.size, 'count': stat.count}
+                                                   for stat in lines]}
+        return report
+
+    # Write the report in a JSON file
+    def save(self, report_file, top=20):
+        if not self.enabled:
+            return
+        with open(report_file, 'w') as f:
+            json.dump(self.report(top), f, indent=2)